@@ -7,6 +7,13 @@ from openai import OpenAI
 from typing import List, Optional, Dict
 import json
 
+# 优先使用 orjson（Rust 实现，解析中文字典/列表更快），未安装时回退标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 
 class DeepSeekClient:
     """DeepSeek API 客户端"""
@@ -92,7 +99,7 @@ class DeepSeekClient:
         
         # 尝试解析 JSON
         try:
-            return json.loads(response)
+            return _json_loads(response)
         except:
             return {"raw_response": response}
     
@@ -130,7 +137,7 @@ class DeepSeekClient:
         response = self.chat(messages, temperature=0.3, max_tokens=1000)
         
         try:
-            return json.loads(response)
+            return _json_loads(response)
         except:
             return {"raw_response": response}
     
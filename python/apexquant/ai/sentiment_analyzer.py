@@ -6,6 +6,22 @@ from typing import List, Dict
 from .deepseek_client import DeepSeekClient
 
 
+# 整体情绪分类表：(判定条件, 标签)，按顺序匹配，均不满足则为 neutral
+# 条件参数: positive, negative, avg_score
+_MARKET_SENTIMENT_RULES = (
+    (lambda pos, neg, score: pos > neg and score > 0.6, 'positive'),
+    (lambda pos, neg, score: neg > pos and score < 0.4, 'negative'),
+)
+
+
+def _classify_market_sentiment(positive: int, negative: int, avg_score: float) -> str:
+    """按分类表判断整体情绪"""
+    for predicate, label in _MARKET_SENTIMENT_RULES:
+        if predicate(positive, negative, avg_score):
+            return label
+    return 'neutral'
+
+
 class SentimentAnalyzer:
     """新闻情感分析器"""
     
@@ -73,12 +89,7 @@ class SentimentAnalyzer:
         avg_score = sum(scores) / len(scores)
         
         # 判断整体情绪
-        if positive > negative and avg_score > 0.6:
-            overall = 'positive'
-        elif negative > positive and avg_score < 0.4:
-            overall = 'negative'
-        else:
-            overall = 'neutral'
+        overall = _classify_market_sentiment(positive, negative, avg_score)
         
         return {
             'overall_sentiment': overall,
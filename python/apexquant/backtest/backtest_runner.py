@@ -65,16 +65,26 @@ class BacktestRunner:
             return None
         
         # 转换数据为 C++ Bar 对象
+        n = len(data)
+        
+        def column(name, default):
+            return data[name].tolist() if name in data.columns else [default] * n
+        
         bars = []
-        for _, row in data.iterrows():
+        for symbol, timestamp, open_, high, low, close, volume in zip(
+            column('symbol', ''), column('timestamp', 0),
+            data['open'].tolist(), data['high'].tolist(),
+            data['low'].tolist(), data['close'].tolist(),
+            column('volume', 0)
+        ):
             bar = aq.Bar(
-                symbol=row.get('symbol', ''),
-                timestamp=int(row.get('timestamp', 0)),
-                open=float(row['open']),
-                high=float(row['high']),
-                low=float(row['low']),
-                close=float(row['close']),
-                volume=int(row.get('volume', 0))
+                symbol=symbol,
+                timestamp=int(timestamp),
+                open=float(open_),
+                high=float(high),
+                low=float(low),
+                close=float(close),
+                volume=int(volume)
             )
             bars.append(bar)
         
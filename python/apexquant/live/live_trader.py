@@ -2,14 +2,14 @@
 实盘交易管理器
 """
 
-import time
 import threading
 from typing import Dict, List, Optional, Callable
 import pandas as pd
-import sys
-import os
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+try:
+    from apexquant_core import Order
+except ImportError:
+    Order = None
 
 from apexquant.live.signal_generator import AISignalGenerator
 from apexquant.live.rl_agent import RLTradingAgent
@@ -40,6 +40,7 @@ class LiveTrader:
         
         self.running = False
         self.thread = None
+        self._stop_event = threading.Event()
         
         self.watch_list = []
         self.positions = {}
@@ -97,6 +98,7 @@ class LiveTrader:
         print(f"初始资产: {self.initial_value:.2f}")
         
         self.running = True
+        self._stop_event.clear()
         self.thread = threading.Thread(target=self._trading_loop, args=(interval,))
         self.thread.start()
         
@@ -108,6 +110,7 @@ class LiveTrader:
             return
         
         self.running = False
+        self._stop_event.set()
         
         if self.thread:
             self.thread.join()
@@ -127,7 +130,8 @@ class LiveTrader:
                 # 2. 风控检查
                 if not self._risk_check():
                     print("⚠ 触发风控，暂停交易")
-                    time.sleep(interval)
+                    if self._stop_event.wait(interval):
+                        break
                     continue
                 
                 # 3. 生成信号
@@ -143,7 +147,9 @@ class LiveTrader:
             except Exception as e:
                 print(f"交易循环错误: {e}")
             
-            time.sleep(interval)
+            # 可被 stop() 立即唤醒
+            if self._stop_event.wait(interval):
+                break
     
     def _update_positions(self):
         """更新持仓信息"""
@@ -208,7 +214,8 @@ class LiveTrader:
                 if data is None or data.empty:
                     continue
                 
-                current_price = data['close'].iloc[-1]
+                closes = data['close'].to_numpy()
+                current_price = closes[-1]
                 position = self.positions.get(symbol)
                 
                 # AI 信号
@@ -254,6 +261,9 @@ class LiveTrader:
         account = self.trading.query_account()
         available_cash = account.available_cash
         
+        # 先收集本轮所有订单，再统一提交
+        pending = []
+        
         for symbol, signal in signals.items():
             action = signal['action']
             confidence = signal['confidence']
@@ -267,17 +277,54 @@ class LiveTrader:
             if self.on_signal_callback:
                 self.on_signal_callback(symbol, signal)
             
-            # 执行动作
-            if action == 'buy':
-                self._open_position(symbol, price, available_cash)
-            elif action == 'sell':
-                self._close_position(symbol)
+            # 构造订单
+            try:
+                if action == 'buy':
+                    order = self._build_open_order(symbol, price, available_cash)
+                elif action == 'sell':
+                    order = self._build_close_order(symbol)
+                else:
+                    order = None
+            except Exception as e:
+                print(f"构造 {symbol} 订单失败: {e}")
+                continue
+            
+            if order is not None:
+                pending.append((symbol, action, order))
+        
+        if pending:
+            self._submit_orders(pending)
+    
+    def _submit_orders(self, pending: List):
+        """
+        提交本轮订单
+        
+        逐笔提交，单笔失败不影响其余订单；已提交的订单都会记录并回调
+        
+        Args:
+            pending: [(symbol, action, order), ...]
+        """
+        for symbol, action, order in pending:
+            label = '开仓' if action == 'buy' else '平仓'
+            try:
+                order_id = self.trading.submit_order(order)
+            except Exception as e:
+                print(f"{label} {symbol} 失败: {e}")
+                continue
+            
+            print(f"{label} {symbol}: 价格 {order.price:.2f}, 数量 {order.volume}")
+            
+            if self.on_order_callback:
+                self.on_order_callback(symbol, action, order.price, order.volume, order_id)
     
-    def _open_position(self, symbol: str, price: float, available_cash: float):
-        """开仓"""
+    def _build_open_order(self, symbol: str, price: float, available_cash: float):
+        """构造开仓订单，不满足条件时返回 None"""
+        if not hasattr(self.trading, 'submit_order'):
+            return None
+        
         # 检查是否已有持仓
         if symbol in self.positions and self.positions[symbol].total_volume > 0:
-            return
+            return None
         
         # 计算仓位
         max_position_value = self.initial_value * self.risk_limits['max_position_size']
@@ -285,55 +332,51 @@ class LiveTrader:
         volume = int(position_value / price / 100) * 100  # 整手
         
         if volume < 100:
-            return
+            return None
         
-        # 提交订单
-        try:
-            # 构造订单（需要根据实际接口调整）
-            if hasattr(self.trading, 'submit_order'):
-                from apexquant_core import Order  # 假设有这个
-                order = Order()
-                order.symbol = symbol
-                order.direction = 0  # BUY
-                order.price = price
-                order.volume = volume
-                
-                order_id = self.trading.submit_order(order)
-                print(f"开仓 {symbol}: 价格 {price:.2f}, 数量 {volume}")
-                
-                if self.on_order_callback:
-                    self.on_order_callback(symbol, 'buy', price, volume, order_id)
-            
-        except Exception as e:
-            print(f"开仓 {symbol} 失败: {e}")
+        if Order is None:
+            raise ImportError("C++ 核心模块未加载，无法构造订单")
+        
+        # 构造订单（需要根据实际接口调整）
+        order = Order()
+        order.symbol = symbol
+        order.direction = 0  # BUY
+        order.price = price
+        order.volume = volume
+        return order
     
-    def _close_position(self, symbol: str):
-        """平仓"""
+    def _build_close_order(self, symbol: str):
+        """构造平仓订单，无持仓时返回 None"""
+        if not hasattr(self.trading, 'submit_order'):
+            return None
+        
         if symbol not in self.positions:
-            return
+            return None
         
         pos = self.positions[symbol]
         if pos.total_volume == 0:
-            return
+            return None
         
-        # 提交卖单
-        try:
-            if hasattr(self.trading, 'submit_order'):
-                from apexquant_core import Order
-                order = Order()
-                order.symbol = symbol
-                order.direction = 1  # SELL
-                order.price = pos.current_price
-                order.volume = pos.total_volume
-                
-                order_id = self.trading.submit_order(order)
-                print(f"平仓 {symbol}: 价格 {pos.current_price:.2f}, 数量 {pos.total_volume}")
-                
-                if self.on_order_callback:
-                    self.on_order_callback(symbol, 'sell', pos.current_price, pos.total_volume, order_id)
+        if Order is None:
+            raise ImportError("C++ 核心模块未加载，无法构造订单")
         
+        order = Order()
+        order.symbol = symbol
+        order.direction = 1  # SELL
+        order.price = pos.current_price
+        order.volume = pos.total_volume
+        return order
+    
+    def _close_position(self, symbol: str):
+        """平仓"""
+        try:
+            order = self._build_close_order(symbol)
         except Exception as e:
             print(f"平仓 {symbol} 失败: {e}")
+            return
+        
+        if order is not None:
+            self._submit_orders([(symbol, 'sell', order)])
     
     def get_status(self) -> Dict:
         """获取交易状态"""
@@ -4,9 +4,100 @@
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import pickle
 import os
+import zipfile
+
+from apexquant.utils.jit_utils import njit
+
+
+# Q-table 键：各维都在编码范围内时为单个整数，否则为离散化后的元组
+StateKey = Union[int, Tuple[int, ...]]
+
+
+@njit(cache=True, fastmath=True)
+def _rsi_nb(prices, period):
+    """计算序列末尾 period 个差分的 RSI"""
+    n = len(prices)
+    if n < period + 1:
+        return 50.0
+    
+    gain = 0.0
+    loss = 0.0
+    for i in range(n - period, n):
+        delta = prices[i] - prices[i - 1]
+        if delta > 0:
+            gain += delta
+        else:
+            loss -= delta
+    
+    if loss == 0:
+        return 100.0
+    
+    rs = gain / loss
+    return 100.0 - 100.0 / (1.0 + rs)
+
+
+@njit(cache=True)
+def _build_state_nb(close_prices, volumes, pos_volume, avg_price, out):
+    """
+    由最近 20 根 K 线构造状态向量，结果写入 out
+    
+    特征顺序: 价格归一化、MA5/MA10 趋势、MA5/MA20 趋势、动量、波动率、
+    成交量归一化、持仓比例、持仓收益、RSI、MACD 信号
+    """
+    n = len(close_prices)
+    
+    # 均值/标准差（总体标准差，与 np.std 一致）
+    price_mean = 0.0
+    volume_mean = 0.0
+    for i in range(n):
+        price_mean += close_prices[i]
+        volume_mean += volumes[i]
+    price_mean /= n
+    volume_mean /= n
+    
+    price_var = 0.0
+    volume_var = 0.0
+    for i in range(n):
+        dp = close_prices[i] - price_mean
+        dv = volumes[i] - volume_mean
+        price_var += dp * dp
+        volume_var += dv * dv
+    price_std = np.sqrt(price_var / n) + 1e-8
+    volume_std = np.sqrt(volume_var / n) + 1e-8
+    
+    ma5 = 0.0
+    for i in range(n - 5, n):
+        ma5 += close_prices[i]
+    ma5 /= 5
+    ma10 = 0.0
+    for i in range(n - 10, n):
+        ma10 += close_prices[i]
+    ma10 /= 10
+    ma20 = price_mean
+    
+    last_price = close_prices[n - 1]
+    
+    features = np.zeros(10)
+    features[0] = (last_price - price_mean) / price_std
+    features[1] = (ma5 - ma10) / price_mean
+    features[2] = (ma5 - ma20) / price_mean
+    features[3] = (last_price - close_prices[n - 5]) / close_prices[n - 5]
+    features[4] = price_std / price_mean
+    features[5] = (volumes[n - 1] - volume_mean) / volume_std
+    
+    if pos_volume > 0:
+        features[6] = pos_volume / 1000.0  # 假设最大持仓 1000 股
+        features[7] = (last_price - avg_price) / avg_price
+    
+    features[8] = _rsi_nb(close_prices, 14) / 100.0
+    # features[9]（MACD 信号）需要至少 26 根数据，20 根窗口下恒为 0
+    
+    m = min(len(out), 10)
+    for j in range(m):
+        out[j] = features[j]
 
 
 class RLTradingAgent:
@@ -34,10 +125,14 @@ class RLTradingAgent:
         self.model_path = model_path
         
         # 简单 Q-table（完整版应使用深度网络）
+        # 键为离散化状态的编码（见 StateKey），值为各动作的 Q 值（float32，仅用于 argmax）
         self.q_table = {}
+        self.state_bins = 10
+        self._init_state_encoding()
         self.learning_rate = 0.1
         self.gamma = 0.95
         self.epsilon = 0.1
+        self._rng = np.random.default_rng()
         
         # 加载模型
         if model_path and os.path.exists(model_path):
@@ -59,91 +154,72 @@ class RLTradingAgent:
         if len(data) < 20:
             return np.zeros(self.state_dim)
         
-        close_prices = data['close'].values[-20:]
-        volumes = data['volume'].values[-20:]
-        
-        # 标准化
-        price_mean = np.mean(close_prices)
-        price_std = np.std(close_prices) + 1e-8
-        volume_mean = np.mean(volumes)
-        volume_std = np.std(volumes) + 1e-8
-        
-        # 构造状态特征
-        state = []
-        
-        # 1. 价格归一化特征
-        current_price_norm = (close_prices[-1] - price_mean) / price_std
-        state.append(current_price_norm)
-        
-        # 2. 短期趋势
-        ma5 = np.mean(close_prices[-5:])
-        ma10 = np.mean(close_prices[-10:])
-        trend_5_10 = (ma5 - ma10) / price_mean
-        state.append(trend_5_10)
-        
-        # 3. 长期趋势
-        ma20 = np.mean(close_prices)
-        trend_5_20 = (ma5 - ma20) / price_mean
-        state.append(trend_5_20)
+        return self.get_state_from_arrays(
+            data['close'].to_numpy(dtype=np.float64),
+            data['volume'].to_numpy(dtype=np.float64),
+            position
+        )
+    
+    def get_state_from_arrays(self,
+                              close: np.ndarray,
+                              volume: np.ndarray,
+                              position: Optional[Dict] = None) -> np.ndarray:
+        """
+        从收盘价/成交量数组提取状态（跳过 DataFrame 切片，供训练循环使用）
         
-        # 4. 价格动量
-        momentum = (close_prices[-1] - close_prices[-5]) / close_prices[-5]
-        state.append(momentum)
+        Args:
+            close: 收盘价数组（float64）
+            volume: 成交量数组（float64）
+            position: 当前持仓
         
-        # 5. 波动率
-        volatility = price_std / price_mean
-        state.append(volatility)
+        Returns:
+            状态向量
+        """
+        if len(close) < 20:
+            return np.zeros(self.state_dim)
         
-        # 6. 成交量归一化
-        volume_norm = (volumes[-1] - volume_mean) / volume_std
-        state.append(volume_norm)
+        close_prices = np.ascontiguousarray(close[-20:], dtype=np.float64)
+        volumes = np.ascontiguousarray(volume[-20:], dtype=np.float64)
         
-        # 7. 持仓状态
+        # 持仓状态
         if position and position.get('volume', 0) > 0:
-            pos_ratio = position['volume'] / 1000.0  # 假设最大持仓 1000 股
-            profit_ratio = (close_prices[-1] - position['avg_price']) / position['avg_price']
-            state.extend([pos_ratio, profit_ratio])
+            pos_volume = float(position['volume'])
+            avg_price = float(position['avg_price'])
         else:
-            state.extend([0.0, 0.0])
-        
-        # 8. RSI
-        rsi = self._calculate_rsi(close_prices, period=14)
-        state.append(rsi / 100.0)
+            pos_volume = 0.0
+            avg_price = 0.0
         
-        # 9. MACD 信号
-        macd_signal = self._calculate_macd_signal(close_prices)
-        state.append(macd_signal)
-        
-        # 确保维度正确
-        state = np.array(state[:self.state_dim])
-        if len(state) < self.state_dim:
-            state = np.pad(state, (0, self.state_dim - len(state)))
+        state = np.zeros(self.state_dim)
+        _build_state_nb(close_prices, volumes, pos_volume, avg_price, state)
         
         return state
     
     def select_action(self, 
                      state: np.ndarray,
-                     deterministic: bool = False) -> int:
+                     deterministic: bool = False,
+                     state_key: Optional[StateKey] = None) -> int:
         """
         选择动作
         
         Args:
             state: 当前状态
             deterministic: 是否确定性选择
+            state_key: 已计算好的状态编码（可选，避免重复离散化）
         
         Returns:
             动作 (0: hold, 1: buy, 2: sell)
         """
         # 离散化状态（用于 Q-table）
-        state_key = self._discretize_state(state)
+        if state_key is None:
+            state_key = self._discretize_state(state)
         
         # ε-greedy 策略
-        if not deterministic and np.random.random() < self.epsilon:
-            return np.random.randint(self.action_dim)
+        if not deterministic and self._rng.random() < self.epsilon:
+            return int(self._rng.integers(self.action_dim))
         
         # 选择最优动作
         if state_key not in self.q_table:
-            self.q_table[state_key] = np.zeros(self.action_dim)
+            self.q_table[state_key] = np.zeros(self.action_dim, dtype=np.float32)
         
         return np.argmax(self.q_table[state_key])
     
@@ -152,7 +228,9 @@ class RLTradingAgent:
               action: int,
               reward: float,
               next_state: np.ndarray,
-              done: bool = False):
+              done: bool = False,
+              state_key: Optional[StateKey] = None,
+              next_state_key: Optional[StateKey] = None):
         """
         更新模型（Q-learning）
         
@@ -162,14 +240,18 @@ class RLTradingAgent:
             reward: 获得的奖励
             next_state: 下一状态
             done: 是否结束
+            state_key: 当前状态编码（可选）
+            next_state_key: 下一状态编码（可选）
         """
-        state_key = self._discretize_state(state)
-        next_state_key = self._discretize_state(next_state)
+        if state_key is None:
+            state_key = self._discretize_state(state)
+        if next_state_key is None:
+            next_state_key = self._discretize_state(next_state)
         
         if state_key not in self.q_table:
-            self.q_table[state_key] = np.zeros(self.action_dim)
+            self.q_table[state_key] = np.zeros(self.action_dim, dtype=np.float32)
         if next_state_key not in self.q_table:
-            self.q_table[next_state_key] = np.zeros(self.action_dim)
+            self.q_table[next_state_key] = np.zeros(self.action_dim, dtype=np.float32)
         
         # Q-learning 更新
         current_q = self.q_table[state_key][action]
@@ -197,16 +279,26 @@ class RLTradingAgent:
         total_reward = 0.0
         trades = 0
         
-        for i in range(20, len(data)):
-            # 当前状态
-            current_data = data.iloc[:i+1]
-            state = self.get_state(current_data, position)
+        # 一次性取出底层数组，循环内不再做 DataFrame 切片
+        close_arr = data['close'].to_numpy(dtype=np.float64)
+        vol_arr = data['volume'].to_numpy(dtype=np.float64)
+        
+        # 与持仓无关的特征一次性批量算好，第 i 根 K 线对应 static_states[i - 19]
+        if len(close_arr) > 20:
+            close_windows = np.lib.stride_tricks.sliding_window_view(close_arr, 20)
+            vol_windows = np.lib.stride_tricks.sliding_window_view(vol_arr, 20)
+            static_states = self._precompute_states(close_windows, vol_windows)
             
+            # 初始状态；之后每步直接沿用上一步算好的下一状态
+            state = self._with_position(static_states[1], close_arr[20], position)
+            state_key = self._discretize_state(state)
+        
+        for i in range(20, len(data)):
             # 选择动作
-            action = self.select_action(state, deterministic=False)
+            action = self.select_action(state, deterministic=False, state_key=state_key)
             
             # 执行动作
-            current_price = data.iloc[i]['close']
+            current_price = close_arr[i]
             reward = 0.0
             
             if action == 1 and position['volume'] == 0:  # Buy
@@ -233,21 +325,25 @@ class RLTradingAgent:
             
             # 下一状态
             if i < len(data) - 1:
-                next_data = data.iloc[:i+2]
-                next_state = self.get_state(next_data, position)
+                next_state = self._with_position(static_states[i-18], close_arr[i+1], position)
+                next_state_key = self._discretize_state(next_state)
                 done = False
             else:
                 next_state = state
+                next_state_key = state_key
                 done = True
             
             # 更新模型
-            self.update(state, action, reward, next_state, done)
+            self.update(state, action, reward, next_state, done,
+                        state_key=state_key, next_state_key=next_state_key)
             total_reward += reward
+            
+            state, state_key = next_state, next_state_key
         
         # 最终资产
         final_value = cash
         if position['volume'] > 0:
-            final_value += position['volume'] * data.iloc[-1]['close']
+            final_value += position['volume'] * close_arr[-1]
         
         return {
             'total_reward': total_reward,
@@ -256,69 +352,151 @@ class RLTradingAgent:
             'trades': trades
         }
     
+    def _precompute_states(self,
+                           close_windows: np.ndarray,
+                           vol_windows: np.ndarray) -> np.ndarray:
+        """
+        批量计算每个 20 根窗口的状态（持仓两列置 0），与 _build_state_nb 结果一致
+        
+        Args:
+            close_windows: 收盘价滑动窗口 (N, 20)
+            vol_windows: 成交量滑动窗口 (N, 20)
+        
+        Returns:
+            状态矩阵 (N, state_dim)
+        """
+        price_mean = close_windows.mean(axis=1)
+        price_std = close_windows.std(axis=1) + 1e-8
+        volume_mean = vol_windows.mean(axis=1)
+        volume_std = vol_windows.std(axis=1) + 1e-8
+        
+        last_price = close_windows[:, -1]
+        ma5 = close_windows[:, -5:].mean(axis=1)
+        ma10 = close_windows[:, -10:].mean(axis=1)
+        
+        # RSI(14)
+        deltas = np.diff(close_windows[:, -15:], axis=1)
+        avg_gain = np.maximum(deltas, 0).mean(axis=1)
+        avg_loss = -np.minimum(deltas, 0).mean(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+        
+        features = np.zeros((len(close_windows), 10))
+        features[:, 0] = (last_price - price_mean) / price_std
+        features[:, 1] = (ma5 - ma10) / price_mean
+        features[:, 2] = (ma5 - price_mean) / price_mean
+        features[:, 3] = (last_price - close_windows[:, -5]) / close_windows[:, -5]
+        features[:, 4] = price_std / price_mean
+        features[:, 5] = (vol_windows[:, -1] - volume_mean) / volume_std
+        features[:, 8] = rsi / 100.0
+        # MACD 需要至少 26 根数据，20 根窗口下恒为 0
+        
+        states = np.zeros((len(close_windows), self.state_dim))
+        m = min(self.state_dim, 10)
+        states[:, :m] = features[:, :m]
+        return states
+    
+    def _with_position(self,
+                       static_state: np.ndarray,
+                       price: float,
+                       position: Dict) -> np.ndarray:
+        """在预计算状态上填入持仓相关的两列"""
+        state = static_state.copy()
+        if position['volume'] > 0:
+            position_features = (
+                position['volume'] / 1000.0,  # 假设最大持仓 1000 股
+                (price - position['avg_price']) / position['avg_price']
+            )
+            for j, value in enumerate(position_features, start=6):
+                if j < self.state_dim:
+                    state[j] = value
+        return state
+    
     def save_model(self, path: str):
-        """保存模型"""
+        """保存模型（npz 压缩格式，Q-table 以键数组 + 值矩阵存储）"""
+        int_keys, int_values, tuple_keys, tuple_values = [], [], [], []
+        for key, q_values in self.q_table.items():
+            if isinstance(key, tuple):
+                tuple_keys.append(key)
+                tuple_values.append(q_values)
+            else:
+                int_keys.append(key)
+                int_values.append(q_values)
+        
+        def stack(values):
+            if values:
+                return np.stack(values)
+            return np.zeros((0, self.action_dim), dtype=np.float32)
+        
+        # 传入文件对象，避免 numpy 自动追加 .npz 后缀
         with open(path, 'wb') as f:
-            pickle.dump({
-                'q_table': self.q_table,
-                'state_dim': self.state_dim,
-                'action_dim': self.action_dim
-            }, f)
+            np.savez_compressed(
+                f,
+                keys=np.array(int_keys, dtype=np.int64),
+                values=stack(int_values),
+                tuple_keys=np.array(tuple_keys, dtype=np.int64).reshape(len(tuple_keys), self.state_dim),
+                tuple_values=stack(tuple_values),
+                state_dim=self.state_dim,
+                action_dim=self.action_dim
+            )
     
     def load_model(self, path: str):
         """加载模型"""
+        if zipfile.is_zipfile(path):
+            with np.load(path) as data:
+                self.state_dim = int(data['state_dim'])
+                self.action_dim = int(data['action_dim'])
+                keys = data['keys']
+                values = data['values'].astype(np.float32, copy=False)
+                if 'tuple_keys' in data.files:
+                    tuple_keys = data['tuple_keys'].tolist()
+                    tuple_values = data['tuple_values'].astype(np.float32, copy=False)
+                else:
+                    tuple_keys, tuple_values = [], []
+            
+            self._init_state_encoding()
+            self.q_table = {int(k): v for k, v in zip(keys, values)}
+            self.q_table.update((tuple(k), v) for k, v in zip(tuple_keys, tuple_values))
+            return
+        
+        # 兼容旧版 pickle 格式
         with open(path, 'rb') as f:
             data = pickle.load(f)
-            self.q_table = data['q_table']
             self.state_dim = data['state_dim']
             self.action_dim = data['action_dim']
-    
-    def _discretize_state(self, state: np.ndarray, bins: int = 10) -> Tuple:
-        """离散化状态"""
-        discretized = tuple((state * bins).astype(int))
-        return discretized
-    
-    def _calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
-        """计算 RSI"""
-        if len(prices) < period + 1:
-            return 50.0
         
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
+        self._init_state_encoding()
         
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        # 兼容旧版以元组为键的 Q-table：编码是单射，旧状态一一对应，不会互相覆盖
+        self.q_table = {}
+        for key, q_values in data['q_table'].items():
+            if isinstance(key, tuple):
+                key = self._encode_discrete(np.array(key, dtype=np.int64))
+            self.q_table[key] = np.asarray(q_values, dtype=np.float32)
     
-    def _calculate_macd_signal(self, prices: np.ndarray) -> float:
-        """计算 MACD 信号"""
-        if len(prices) < 26:
-            return 0.0
-        
-        ema12 = self._ema(prices, 12)
-        ema26 = self._ema(prices, 26)
-        macd = ema12 - ema26
-        
-        return np.tanh(macd / prices[-1])  # 归一化
+    def _init_state_encoding(self):
+        """初始化状态编码权重（每维取值 2 * state_bins 种）及离散化缓冲区"""
+        if (2 * self.state_bins) ** self.state_dim <= 2 ** 63:
+            self._key_powers = (2 * self.state_bins) ** np.arange(self.state_dim, dtype=np.int64)
+        else:
+            # 维度过多时整数编码会溢出 int64，全部使用元组键
+            self._key_powers = None
+        self._disc_buf = np.empty(self.state_dim)
     
-    def _ema(self, prices: np.ndarray, period: int) -> float:
-        """计算 EMA"""
-        if len(prices) < period:
-            return np.mean(prices)
-        
-        multiplier = 2 / (period + 1)
-        ema = prices[-period]
-        
-        for price in prices[-period+1:]:
-            ema = (price - ema) * multiplier + ema
+    def _encode_discrete(self, discretized: np.ndarray) -> StateKey:
+        """
+        编码离散化状态
         
-        return ema
+        各维都在 [-bins, bins) 内时编码为单个整数，否则保留元组（与旧版键一致），
+        不同的离散化状态不会得到相同的键
+        """
+        bins = self.state_bins
+        if self._key_powers is not None and discretized.min() >= -bins and discretized.max() < bins:
+            return int((discretized + bins) @ self._key_powers)
+        return tuple(discretized.tolist())
+    
+    def _discretize_state(self, state: np.ndarray) -> StateKey:
+        """离散化状态并编码为 Q-table 键"""
+        np.multiply(state, self.state_bins, out=self._disc_buf)
+        return self._encode_discrete(self._disc_buf.astype(np.int64))
 
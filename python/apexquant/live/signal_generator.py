@@ -2,7 +2,9 @@
 AI 实时信号生成器
 """
 
-from typing import Dict, List, Optional, Tuple
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import pandas as pd
 import numpy as np
 import sys
@@ -13,6 +15,59 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 from apexquant.ai import DeepSeekClient
 
 
+class _QuickIndicators(NamedTuple):
+    """信号生成用的快速技术指标"""
+    ma5: float
+    ma10: float
+    ma20: float
+    pct_change_1d: float
+    pct_change_5d: float
+    volume_ratio: float
+    trend: str  # 'bull' 多头排列 / 'bear' 空头排列 / 'range' 震荡
+
+
+def _compute_quick_indicators(close: np.ndarray, volume: np.ndarray) -> _QuickIndicators:
+    """
+    基于最近 20 根 K 线一次性计算均线、涨跌幅、量比和趋势
+    
+    Args:
+        close: 收盘价数组（至少 20 个）
+        volume: 成交量数组（至少 5 个）
+    """
+    tail = close[-20:]
+    # 各窗口直接求均值：累加和相减会引入舍入误差，平盘时均线被误判为严格排列
+    ma5 = tail[-5:].mean()
+    ma10 = tail[-10:].mean()
+    ma20 = tail.mean()
+    
+    pct_change_1d = (tail[-1] - tail[-2]) / tail[-2] * 100
+    pct_change_5d = (tail[-1] - tail[-6]) / tail[-6] * 100
+    
+    volume_tail = volume[-5:]
+    volume_ratio = volume_tail[-1] / volume_tail.mean()
+    
+    if ma5 > ma10 > ma20:
+        trend = 'bull'
+    elif ma5 < ma10 < ma20:
+        trend = 'bear'
+    else:
+        trend = 'range'
+    
+    return _QuickIndicators(ma5, ma10, ma20, pct_change_1d, pct_change_5d, volume_ratio, trend)
+
+
+_TREND_LABELS = {'bull': '多头排列', 'bear': '空头排列', 'range': '震荡'}
+
+# AI 响应解析
+_DIGIT_RE = re.compile(r'\d+')
+_LABEL_RE = re.compile(r'(动作|Action|强度|Strength|Confidence|理由|Reason)')
+_LABEL_KINDS = {
+    '动作': 'action', 'Action': 'action',
+    '强度': 'strength', 'Strength': 'strength', 'Confidence': 'strength',
+    '理由': 'reason', 'Reason': 'reason',
+}
+
+
 class AISignalGenerator:
     """AI 驱动的交易信号生成器"""
     
@@ -75,35 +130,17 @@ class AISignalGenerator:
         
         # 技术指标
         if len(data) >= 20:
-            close_prices = data['close'].values
-            
-            # 计算简单指标
-            ma5 = np.mean(close_prices[-5:])
-            ma10 = np.mean(close_prices[-10:])
-            ma20 = np.mean(close_prices[-20:])
-            
-            pct_change_1d = (close_prices[-1] - close_prices[-2]) / close_prices[-2] * 100
-            pct_change_5d = (close_prices[-1] - close_prices[-6]) / close_prices[-6] * 100
-            
-            # 成交量变化
-            volume_ma5 = np.mean(data['volume'].values[-5:])
-            volume_today = data['volume'].values[-1]
-            volume_ratio = volume_today / volume_ma5
+            ind = _compute_quick_indicators(
+                data['close'].to_numpy(dtype=np.float64),
+                data['volume'].to_numpy(dtype=np.float64)
+            )
             
             info += f"【技术指标】\n"
-            info += f"MA5: {ma5:.2f}, MA10: {ma10:.2f}, MA20: {ma20:.2f}\n"
-            info += f"1日涨跌: {pct_change_1d:+.2f}%\n"
-            info += f"5日涨跌: {pct_change_5d:+.2f}%\n"
-            info += f"量比: {volume_ratio:.2f}\n"
-            
-            # 趋势判断
-            if ma5 > ma10 > ma20:
-                info += "趋势: 多头排列\n"
-            elif ma5 < ma10 < ma20:
-                info += "趋势: 空头排列\n"
-            else:
-                info += "趋势: 震荡\n"
-            
+            info += f"MA5: {ind.ma5:.2f}, MA10: {ind.ma10:.2f}, MA20: {ind.ma20:.2f}\n"
+            info += f"1日涨跌: {ind.pct_change_1d:+.2f}%\n"
+            info += f"5日涨跌: {ind.pct_change_5d:+.2f}%\n"
+            info += f"量比: {ind.volume_ratio:.2f}\n"
+            info += f"趋势: {_TREND_LABELS[ind.trend]}\n"
             info += "\n"
         
         # 持仓信息
@@ -162,22 +199,24 @@ class AISignalGenerator:
             
             lines = response.strip().split('\n')
             for line in lines:
-                if '动作' in line or 'Action' in line:
+                labels = _LABEL_RE.findall(line)
+                if not labels:
+                    continue
+                
+                # 同一行含多个标签时按 动作 > 强度 > 理由 的优先级判断，与出现顺序无关
+                kinds = {_LABEL_KINDS[label] for label in labels}
+                if 'action' in kinds:
                     if '买入' in line or 'buy' in line.lower():
                         action = 'buy'
                     elif '卖出' in line or 'sell' in line.lower():
                         action = 'sell'
                     else:
                         action = 'hold'
-                elif '强度' in line or 'Strength' in line or 'Confidence' in line:
-                    try:
-                        import re
-                        numbers = re.findall(r'\d+', line)
-                        if numbers:
-                            confidence = float(numbers[0]) / 100.0
-                    except:
-                        pass
-                elif '理由' in line or 'Reason' in line:
+                elif 'strength' in kinds:
+                    number = _DIGIT_RE.search(line)
+                    if number:
+                        confidence = float(number.group()) / 100.0
+                else:
                     reason = line.split(':', 1)[-1].strip()
             
             return action, confidence, reason
@@ -196,21 +235,19 @@ class AISignalGenerator:
         if len(data) < 20:
             return 'hold', 0.0, "数据不足"
         
-        close_prices = data['close'].values
-        
-        # 计算均线
-        ma5 = np.mean(close_prices[-5:])
-        ma10 = np.mean(close_prices[-10:])
-        ma20 = np.mean(close_prices[-20:])
+        ind = _compute_quick_indicators(
+            data['close'].to_numpy(dtype=np.float64),
+            data['volume'].to_numpy(dtype=np.float64)
+        )
         
         # 趋势判断
-        if ma5 > ma10 > ma20:
+        if ind.trend == 'bull':
             # 多头趋势
             if not position or position.get('volume', 0) == 0:
                 return 'buy', 0.7, "多头排列，建议买入"
             else:
                 return 'hold', 0.8, "持有待涨"
-        elif ma5 < ma10 < ma20:
+        elif ind.trend == 'bear':
             # 空头趋势
             if position and position.get('volume', 0) > 0:
                 return 'sell', 0.7, "空头排列，建议止损"
@@ -227,20 +264,25 @@ class AISignalGenerator:
     def batch_generate_signals(self,
                               symbols: List[str],
                               market_data: Dict[str, pd.DataFrame],
-                              news_data: Optional[Dict[str, List[str]]] = None) -> Dict[str, Tuple[str, float, str]]:
+                              news_data: Optional[Dict[str, List[str]]] = None,
+                              max_workers: int = 16,
+                              timeout: float = 30.0) -> Dict[str, Tuple[str, float, str]]:
         """
         批量生成信号
         
+        AI 启用时并发调用（网络 IO 密集），否则顺序计算规则信号
+        
         Args:
             symbols: 股票代码列表
             market_data: {symbol: DataFrame}
             news_data: {symbol: [news]}
+            max_workers: 并发线程数
+            timeout: 整批 AI 调用超时（秒），超时的股票返回观望信号
         
         Returns:
             {symbol: (action, confidence, reason)}
         """
-        signals = {}
-        
+        tasks = []
         for symbol in symbols:
             if symbol not in market_data:
                 continue
@@ -251,11 +293,40 @@ class AISignalGenerator:
             
             current_price = data['close'].iloc[-1]
             news = news_data.get(symbol, []) if news_data else None
-            
-            signal = self.generate_signal(symbol, current_price, data, news)
-            signals[symbol] = signal
+            tasks.append((symbol, current_price, data, news))
+        
+        if not self.ai_enabled or len(tasks) <= 1:
+            return {
+                symbol: self.generate_signal(symbol, current_price, data, news)
+                for symbol, current_price, data, news in tasks
+            }
+        
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)))
+        try:
+            futures = {
+                executor.submit(self.generate_signal, *task): task[0]
+                for task in tasks
+            }
+            for future in as_completed(futures, timeout=timeout):
+                symbol = futures[future]
+                try:
+                    results[symbol] = future.result()
+                except Exception as e:
+                    # 单只股票失败不影响其他结果
+                    print(f"⚠ {symbol} 信号生成失败: {e}")
+                    results[symbol] = self._rule_based_signal_simple()
+        except FuturesTimeoutError:
+            print(f"⚠ 批量信号生成超时，{len(tasks) - len(results)} 只股票使用观望信号")
+        finally:
+            # 不等待超时的请求
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        return signals
+        # 保持与输入相同的顺序
+        return {
+            symbol: results.get(symbol) or self._rule_based_signal_simple()
+            for symbol, _, _, _ in tasks
+        }
     
     def filter_signals(self,
                       signals: Dict[str, Tuple[str, float, str]],
@@ -2,8 +2,11 @@
 LLM 异常检测器
 """
 
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from collections import Counter, deque
+from itertools import islice
+from typing import ClassVar, Dict, List, Optional
 from datetime import datetime
 import sys
 import os
@@ -20,6 +23,27 @@ class AnomalyDetector:
     分析系统日志和指标，自动识别异常并报警
     """
     
+    # 告警级别图标
+    _SEVERITY_EMOJI: ClassVar[Dict[str, str]] = {
+        'critical': '🔴',
+        'warning': '⚠️',
+        'info': 'ℹ️'
+    }
+    
+    # 指标规则: (异常类型, 严重程度, 指标名, 阈值键, 是否为"大于阈值"触发, 消息模板)
+    _METRIC_RULES = (
+        ('high_drawdown', 'critical', 'max_drawdown', 'max_drawdown', True,
+         "最大回撤 {value:.2%} 超过阈值 {threshold:.2%}"),
+        ('low_win_rate', 'warning', 'win_rate', 'win_rate_min', False,
+         "胜率 {value:.2%} 低于阈值 {threshold:.2%}"),
+        ('high_daily_loss', 'critical', 'daily_pnl', 'daily_loss_pct', False,
+         "单日亏损 {value:.2%} 超过阈值"),
+        ('high_position_count', 'warning', 'position_count', 'position_count_max', True,
+         "持仓数 {value} 超过限制"),
+        ('high_rejection_rate', 'warning', 'rejection_rate', 'error_rate', True,
+         "订单拒绝率 {value:.2%} 过高"),
+    )
+    
     def __init__(self, api_key: Optional[str] = None):
         """初始化"""
         try:
@@ -29,7 +53,15 @@ class AnomalyDetector:
             self.ai_enabled = False
             print("⚠ AI 未启用，异常检测功能受限")
         
-        self.anomaly_history = []
+        # 异常历史（定长环形缓冲区），统计计数在写入时累加
+        self.anomaly_history = deque(maxlen=10000)
+        self._total_count = 0
+        self._by_type = Counter()
+        self._by_severity = Counter()
+        
+        # 最近日志缓冲区（定长），拼接结果缓存到下次写入前
+        self._log_ring = deque(maxlen=50)
+        self._log_summary_cache: Optional[str] = None
         
         # 阈值配置
         self.thresholds = {
@@ -39,6 +71,8 @@ class AnomalyDetector:
             'position_count_max': 10,
             'error_rate': 0.10
         }
+        
+        self._rule_is_gt = np.array([rule[4] for rule in self._METRIC_RULES])
     
     def detect_metric_anomalies(self, metrics: Dict) -> List[Dict]:
         """
@@ -50,91 +84,86 @@ class AnomalyDetector:
         Returns:
             异常列表
         """
-        anomalies = []
+        orders_total = metrics.get('orders_submitted', 0)
+        orders_rejected = metrics.get('orders_rejected', 0)
         
-        # 1. 回撤异常
-        if metrics.get('max_drawdown', 0) > self.thresholds['max_drawdown']:
-            anomalies.append({
-                'type': 'high_drawdown',
-                'severity': 'critical',
-                'metric': 'max_drawdown',
-                'value': metrics['max_drawdown'],
-                'threshold': self.thresholds['max_drawdown'],
-                'message': f"最大回撤 {metrics['max_drawdown']:.2%} 超过阈值 {self.thresholds['max_drawdown']:.2%}"
-            })
+        # 与 _METRIC_RULES 顺序一致；无订单时拒绝率取 NaN，任何比较都不触发
+        values = [
+            metrics.get('max_drawdown', 0),
+            metrics.get('win_rate', 1.0),
+            metrics.get('daily_pnl', 0) / max(metrics.get('total_assets', 100000), 1),
+            metrics.get('position_count', 0),
+            orders_rejected / orders_total if orders_total > 0 else float('nan'),
+        ]
         
-        # 2. 胜率异常
-        if metrics.get('win_rate', 1.0) < self.thresholds['win_rate_min']:
-            anomalies.append({
-                'type': 'low_win_rate',
-                'severity': 'warning',
-                'metric': 'win_rate',
-                'value': metrics['win_rate'],
-                'threshold': self.thresholds['win_rate_min'],
-                'message': f"胜率 {metrics['win_rate']:.2%} 低于阈值 {self.thresholds['win_rate_min']:.2%}"
-            })
+        # 阈值每次从 self.thresholds 读取，直接修改该字典同样生效
+        thresholds = np.array(
+            [self.thresholds[rule[3]] for rule in self._METRIC_RULES],
+            dtype=np.float64
+        )
         
-        # 3. 单日亏损异常
-        daily_pnl_pct = metrics.get('daily_pnl', 0) / max(metrics.get('total_assets', 100000), 1)
-        if daily_pnl_pct < self.thresholds['daily_loss_pct']:
-            anomalies.append({
-                'type': 'high_daily_loss',
-                'severity': 'critical',
-                'metric': 'daily_pnl',
-                'value': daily_pnl_pct,
-                'threshold': self.thresholds['daily_loss_pct'],
-                'message': f"单日亏损 {daily_pnl_pct:.2%} 超过阈值"
-            })
+        # 一次向量化比较得到所有越界指标
+        vals = np.asarray(values, dtype=np.float64)
+        mask = np.where(self._rule_is_gt, vals > thresholds, vals < thresholds)
         
-        # 4. 持仓数异常
-        if metrics.get('position_count', 0) > self.thresholds['position_count_max']:
+        anomalies = []
+        for idx in np.flatnonzero(mask):
+            anomaly_type, severity, metric, threshold_key, _, template = self._METRIC_RULES[idx]
+            value = values[idx]
+            threshold = self.thresholds[threshold_key]
             anomalies.append({
-                'type': 'high_position_count',
-                'severity': 'warning',
-                'metric': 'position_count',
-                'value': metrics['position_count'],
-                'threshold': self.thresholds['position_count_max'],
-                'message': f"持仓数 {metrics['position_count']} 超过限制"
+                'type': anomaly_type,
+                'severity': severity,
+                'metric': metric,
+                'value': value,
+                'threshold': threshold,
+                'message': template.format(value=value, threshold=threshold)
             })
         
-        # 5. 订单拒绝率异常
-        orders_total = metrics.get('orders_submitted', 0)
-        orders_rejected = metrics.get('orders_rejected', 0)
-        
-        if orders_total > 0:
-            rejection_rate = orders_rejected / orders_total
-            if rejection_rate > self.thresholds['error_rate']:
-                anomalies.append({
-                    'type': 'high_rejection_rate',
-                    'severity': 'warning',
-                    'metric': 'rejection_rate',
-                    'value': rejection_rate,
-                    'threshold': self.thresholds['error_rate'],
-                    'message': f"订单拒绝率 {rejection_rate:.2%} 过高"
-                })
-        
-        # 记录异常
+        # 记录异常（同一批次共用一个时间戳）
+        now = datetime.now()
         for anomaly in anomalies:
-            anomaly['timestamp'] = datetime.now()
+            anomaly['timestamp'] = now
             self.anomaly_history.append(anomaly)
+            self._total_count += 1
+            self._by_type[anomaly['type']] += 1
+            self._by_severity[anomaly['severity']] += 1
         
         return anomalies
     
-    def analyze_logs(self, logs: List[str]) -> Optional[str]:
+    def push_log(self, line: str):
+        """
+        追加一条日志到最近日志缓冲区（最多保留 50 条）
+        
+        Args:
+            line: 日志内容
+        """
+        self._log_ring.append(line)
+        self._log_summary_cache = None
+    
+    def analyze_logs(self, logs: Optional[List[str]] = None) -> Optional[str]:
         """
         分析日志，识别潜在问题
         
         Args:
-            logs: 日志列表
+            logs: 日志列表（可选，不传则使用 push_log 写入的最近日志）
         
         Returns:
             分析报告
         """
-        if not self.ai_enabled or not logs:
+        if not self.ai_enabled:
             return None
         
-        # 准备日志摘要
-        log_summary = '\n'.join(logs[-50:])  # 最近50条
+        # 准备日志摘要（最近50条）
+        if logs is not None:
+            log_summary = '\n'.join(logs[-50:])
+        else:
+            if self._log_summary_cache is None:
+                self._log_summary_cache = '\n'.join(self._log_ring)
+            log_summary = self._log_summary_cache
+        
+        if not log_summary:
+            return None
         
         prompt = f"""
 你是系统运维专家。请分析以下交易系统日志，识别潜在问题。
@@ -230,47 +259,29 @@ class AnomalyDetector:
         if not anomalies:
             return "系统运行正常"
         
-        message = f"⚠️ 检测到 {len(anomalies)} 个异常\n\n"
+        parts = [f"⚠️ 检测到 {len(anomalies)} 个异常\n\n"]
         
         for i, anomaly in enumerate(anomalies, 1):
-            severity_emoji = {
-                'critical': '🔴',
-                'warning': '⚠️',
-                'info': 'ℹ️'
-            }.get(anomaly['severity'], 'ℹ️')
+            severity_emoji = self._SEVERITY_EMOJI.get(anomaly['severity'], 'ℹ️')
             
-            message += f"{severity_emoji} {i}. {anomaly['message']}\n"
-            message += f"   类型: {anomaly['type']}\n"
-            message += f"   当前值: {anomaly['value']}\n"
-            message += f"   阈值: {anomaly['threshold']}\n\n"
-        
-        return message
+            parts.append(
+                f"{severity_emoji} {i}. {anomaly['message']}\n"
+                f"   类型: {anomaly['type']}\n"
+                f"   当前值: {anomaly['value']}\n"
+                f"   阈值: {anomaly['threshold']}\n\n"
+            )
+        
+        return ''.join(parts)
     
     def get_anomaly_summary(self) -> Dict:
-        """获取异常统计"""
-        if not self.anomaly_history:
-            return {
-                'total_count': 0,
-                'by_type': {},
-                'by_severity': {},
-                'recent': []
-            }
-        
-        by_type = {}
-        by_severity = {}
-        
-        for anomaly in self.anomaly_history:
-            anomaly_type = anomaly['type']
-            severity = anomaly['severity']
-            
-            by_type[anomaly_type] = by_type.get(anomaly_type, 0) + 1
-            by_severity[severity] = by_severity.get(severity, 0) + 1
+        """获取异常统计（计数为累计值，历史仅保留最近 10000 条）"""
+        history = self.anomaly_history
         
         return {
-            'total_count': len(self.anomaly_history),
-            'by_type': by_type,
-            'by_severity': by_severity,
-            'recent': self.anomaly_history[-10:]
+            'total_count': self._total_count,
+            'by_type': dict(self._by_type),
+            'by_severity': dict(self._by_severity),
+            'recent': list(islice(history, max(0, len(history) - 10), None))
         }
     
     def set_thresholds(self, thresholds: Dict):
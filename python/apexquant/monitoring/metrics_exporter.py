@@ -2,41 +2,135 @@
 Prometheus 指标导出器
 """
 
-from typing import Dict, Optional
+from typing import Dict, Iterator, Mapping, Optional
+import threading
 import time
+from array import array
+from operator import itemgetter
+from types import MappingProxyType
 from datetime import datetime
 
 
+# 导出顺序及 HELP/TYPE 说明：(指标名, 说明, 类型)
+_PROMETHEUS_METRICS = (
+    # 账户指标
+    ('total_assets', '总资产', 'gauge'),
+    ('profit_loss', '盈亏', 'gauge'),
+    ('profit_loss_pct', '盈亏比例', 'gauge'),
+    ('daily_pnl', '当日盈亏', 'gauge'),
+    # 性能指标
+    ('win_rate', '胜率', 'gauge'),
+    ('max_drawdown', '最大回撤', 'gauge'),
+    ('sharpe_ratio', '夏普比率', 'gauge'),
+    # 交易指标
+    ('trade_count', '交易次数', 'counter'),
+    ('position_count', '持仓数', 'gauge'),
+    ('orders_submitted', '已提交订单数', 'counter'),
+    ('orders_filled', '已成交订单数', 'counter'),
+    ('orders_rejected', '已拒绝订单数', 'counter'),
+    ('signal_count', '信号数', 'counter'),
+    # 最后更新时间
+    ('last_update', '最后更新时间戳', 'gauge'),
+)
+
+# get_metrics 返回的指标名顺序
+_METRIC_NAMES = (
+    'total_assets', 'profit_loss', 'profit_loss_pct',
+    'win_rate', 'max_drawdown', 'sharpe_ratio',
+    'trade_count', 'position_count', 'daily_pnl',
+    'orders_submitted', 'orders_filled', 'orders_rejected',
+    'signal_count', 'last_update',
+)
+
+# 按取值类型分两个数组存放（与 Prometheus 的 gauge/counter 类型无关）：
+# 浮点指标存于 array('d')，整数指标（计数及持仓数）存于 array('q')，以下为各自的下标
+_FLOAT_NAMES = (
+    'total_assets', 'profit_loss', 'profit_loss_pct', 'daily_pnl',
+    'win_rate', 'max_drawdown', 'sharpe_ratio', 'last_update',
+)
+(_TOTAL_ASSETS, _PROFIT_LOSS, _PROFIT_LOSS_PCT, _DAILY_PNL,
+ _WIN_RATE, _MAX_DRAWDOWN, _SHARPE_RATIO, _LAST_UPDATE) = range(len(_FLOAT_NAMES))
+
+_INT_NAMES = (
+    'trade_count', 'position_count',
+    'orders_submitted', 'orders_filled', 'orders_rejected', 'signal_count',
+)
+(_TRADE_COUNT, _POSITION_COUNT,
+ _ORDERS_SUBMITTED, _ORDERS_FILLED, _ORDERS_REJECTED, _SIGNAL_COUNT) = range(len(_INT_NAMES))
+
+# 在 [浮点指标..., 整数指标...] 拼接列表中按导出顺序 / get_metrics 顺序取值
+_ALL_NAMES = _FLOAT_NAMES + _INT_NAMES
+_export_values = itemgetter(*[_ALL_NAMES.index(key) for key, _, _ in _PROMETHEUS_METRICS])
+_metric_values = itemgetter(*[_ALL_NAMES.index(name) for name in _METRIC_NAMES])
+
+
 class MetricsExporter:
     """
     Prometheus 指标导出器
     
     暴露交易系统关键指标供 Prometheus 抓取
+    
+    指标按取值类型连续存放在两个定长数组中（浮点 array('d')、整数 array('q')），
+    写入时统一转换为 float / int，导出时各一次 tolist() 取出全部数值，
+    只在 get_metrics() 时组装成字典
+    
+    线程安全：更新、修改标签和导出都在同一把锁内进行，
+    并发累加计数不会丢失，导出得到的是同一时刻的一致快照
     """
     
+    __slots__ = (
+        '_floats', '_ints', '_lock',
+        'labels', '_label_str', '_line_prefixes', '_line_prefix_bytes',
+        '_generation', '_text_cache', '_bytes_cache',
+    )
+    
     def __init__(self):
         """初始化"""
-        self.metrics = {
-            'total_assets': 0.0,
-            'profit_loss': 0.0,
-            'profit_loss_pct': 0.0,
-            'win_rate': 0.0,
-            'max_drawdown': 0.0,
-            'sharpe_ratio': 0.0,
-            'trade_count': 0,
-            'position_count': 0,
-            'daily_pnl': 0.0,
-            'orders_submitted': 0,
-            'orders_filled': 0,
-            'orders_rejected': 0,
-            'signal_count': 0,
-            'last_update': time.time()
-        }
-        
-        self.labels = {
+        self._floats = array('d', [0.0] * len(_FLOAT_NAMES))
+        self._ints = array('q', [0] * len(_INT_NAMES))
+        self._floats[_LAST_UPDATE] = time.time()
+        self._lock = threading.Lock()
+        
+        # 标签只读；修改请使用 set_labels，以便同步刷新缓存的前缀
+        self.labels = MappingProxyType({
             'system': 'apexquant',
             'version': '1.0.0'
-        }
+        })
+        self._build_line_prefixes()
+        
+        # 指标每次更新递增代数；导出结果按代数缓存，指标未变时直接复用
+        self._generation = 0
+        self._text_cache = (-1, '')
+        self._bytes_cache = (-1, b'')
+    
+    def set_labels(self, labels: Dict[str, str]):
+        """
+        更新指标标签
+        
+        Args:
+            labels: 需要新增或覆盖的标签
+        """
+        with self._lock:
+            self.labels = MappingProxyType({**self.labels, **labels})
+            self._build_line_prefixes()
+            self._generation += 1
+    
+    def _build_line_prefixes(self):
+        """根据当前标签生成标签串及各指标的行前缀"""
+        self._label_str = ','.join([f'{k}="{v}"' for k, v in self.labels.items()])
+        
+        # (指标名, 前缀)：每个指标的 HELP/TYPE 行与 "名称{标签} " 前缀只拼接一次
+        self._line_prefixes = tuple(
+            (key,
+             f'# HELP apexquant_{key} {help_text}\n'
+             f'# TYPE apexquant_{key} {metric_type}\n'
+             f'apexquant_{key}{{{self._label_str}}} ')
+            for key, help_text, metric_type in _PROMETHEUS_METRICS
+        )
+        # UTF-8 编码后的前缀，供 export_prometheus_bytes 直接拼接
+        self._line_prefix_bytes = tuple(
+            (key, prefix.encode('utf-8')) for key, prefix in self._line_prefixes
+        )
     
     def update_account_metrics(self, account: Dict):
         """
@@ -45,11 +139,19 @@ class MetricsExporter:
         Args:
             account: 账户信息字典
         """
-        self.metrics['total_assets'] = account.get('total_assets', 0.0)
-        self.metrics['profit_loss'] = account.get('profit_loss', 0.0)
-        self.metrics['profit_loss_pct'] = account.get('profit_loss_pct', 0.0)
-        self.metrics['daily_pnl'] = account.get('daily_pnl', 0.0)
-        self.metrics['last_update'] = time.time()
+        total_assets = float(account.get('total_assets', 0.0))
+        profit_loss = float(account.get('profit_loss', 0.0))
+        profit_loss_pct = float(account.get('profit_loss_pct', 0.0))
+        daily_pnl = float(account.get('daily_pnl', 0.0))
+        
+        with self._lock:
+            floats = self._floats
+            floats[_TOTAL_ASSETS] = total_assets
+            floats[_PROFIT_LOSS] = profit_loss
+            floats[_PROFIT_LOSS_PCT] = profit_loss_pct
+            floats[_DAILY_PNL] = daily_pnl
+            floats[_LAST_UPDATE] = time.time()
+            self._generation += 1
     
     def update_performance_metrics(self, performance: Dict):
         """
@@ -58,10 +160,17 @@ class MetricsExporter:
         Args:
             performance: 性能指标字典
         """
-        self.metrics['win_rate'] = performance.get('win_rate', 0.0)
-        self.metrics['max_drawdown'] = performance.get('max_drawdown', 0.0)
-        self.metrics['sharpe_ratio'] = performance.get('sharpe_ratio', 0.0)
-        self.metrics['last_update'] = time.time()
+        win_rate = float(performance.get('win_rate', 0.0))
+        max_drawdown = float(performance.get('max_drawdown', 0.0))
+        sharpe_ratio = float(performance.get('sharpe_ratio', 0.0))
+        
+        with self._lock:
+            floats = self._floats
+            floats[_WIN_RATE] = win_rate
+            floats[_MAX_DRAWDOWN] = max_drawdown
+            floats[_SHARPE_RATIO] = sharpe_ratio
+            floats[_LAST_UPDATE] = time.time()
+            self._generation += 1
     
     def update_trading_metrics(self, 
                                trade_count: int,
@@ -79,92 +188,100 @@ class MetricsExporter:
             orders_filled: 已成交订单数
             orders_rejected: 已拒绝订单数
         """
-        self.metrics['trade_count'] = trade_count
-        self.metrics['position_count'] = position_count
-        self.metrics['orders_submitted'] += orders_submitted
-        self.metrics['orders_filled'] += orders_filled
-        self.metrics['orders_rejected'] += orders_rejected
-        self.metrics['last_update'] = time.time()
+        trade_count = int(trade_count)
+        position_count = int(position_count)
+        orders_submitted = int(orders_submitted)
+        orders_filled = int(orders_filled)
+        orders_rejected = int(orders_rejected)
+        
+        with self._lock:
+            ints = self._ints
+            ints[_TRADE_COUNT] = trade_count
+            ints[_POSITION_COUNT] = position_count
+            ints[_ORDERS_SUBMITTED] += orders_submitted
+            ints[_ORDERS_FILLED] += orders_filled
+            ints[_ORDERS_REJECTED] += orders_rejected
+            self._floats[_LAST_UPDATE] = time.time()
+            self._generation += 1
     
     def increment_signal_count(self):
         """增加信号计数"""
-        self.metrics['signal_count'] += 1
+        with self._lock:
+            self._ints[_SIGNAL_COUNT] += 1
+            self._generation += 1
     
     def export_prometheus_format(self) -> str:
         """
         导出 Prometheus 格式指标
         
+        指标未更新时直接返回上次生成的文本
+        
         Returns:
             Prometheus 格式的指标文本
         """
-        lines = []
-        
-        # 标签字符串
-        label_str = ','.join([f'{k}="{v}"' for k, v in self.labels.items()])
-        
-        # 账户指标
-        lines.append(f'# HELP apexquant_total_assets 总资产')
-        lines.append(f'# TYPE apexquant_total_assets gauge')
-        lines.append(f'apexquant_total_assets{{{label_str}}} {self.metrics["total_assets"]}')
-        
-        lines.append(f'# HELP apexquant_profit_loss 盈亏')
-        lines.append(f'# TYPE apexquant_profit_loss gauge')
-        lines.append(f'apexquant_profit_loss{{{label_str}}} {self.metrics["profit_loss"]}')
-        
-        lines.append(f'# HELP apexquant_profit_loss_pct 盈亏比例')
-        lines.append(f'# TYPE apexquant_profit_loss_pct gauge')
-        lines.append(f'apexquant_profit_loss_pct{{{label_str}}} {self.metrics["profit_loss_pct"]}')
-        
-        lines.append(f'# HELP apexquant_daily_pnl 当日盈亏')
-        lines.append(f'# TYPE apexquant_daily_pnl gauge')
-        lines.append(f'apexquant_daily_pnl{{{label_str}}} {self.metrics["daily_pnl"]}')
-        
-        # 性能指标
-        lines.append(f'# HELP apexquant_win_rate 胜率')
-        lines.append(f'# TYPE apexquant_win_rate gauge')
-        lines.append(f'apexquant_win_rate{{{label_str}}} {self.metrics["win_rate"]}')
-        
-        lines.append(f'# HELP apexquant_max_drawdown 最大回撤')
-        lines.append(f'# TYPE apexquant_max_drawdown gauge')
-        lines.append(f'apexquant_max_drawdown{{{label_str}}} {self.metrics["max_drawdown"]}')
-        
-        lines.append(f'# HELP apexquant_sharpe_ratio 夏普比率')
-        lines.append(f'# TYPE apexquant_sharpe_ratio gauge')
-        lines.append(f'apexquant_sharpe_ratio{{{label_str}}} {self.metrics["sharpe_ratio"]}')
-        
-        # 交易指标
-        lines.append(f'# HELP apexquant_trade_count 交易次数')
-        lines.append(f'# TYPE apexquant_trade_count counter')
-        lines.append(f'apexquant_trade_count{{{label_str}}} {self.metrics["trade_count"]}')
-        
-        lines.append(f'# HELP apexquant_position_count 持仓数')
-        lines.append(f'# TYPE apexquant_position_count gauge')
-        lines.append(f'apexquant_position_count{{{label_str}}} {self.metrics["position_count"]}')
-        
-        lines.append(f'# HELP apexquant_orders_submitted 已提交订单数')
-        lines.append(f'# TYPE apexquant_orders_submitted counter')
-        lines.append(f'apexquant_orders_submitted{{{label_str}}} {self.metrics["orders_submitted"]}')
+        with self._lock:
+            generation, text = self._text_cache
+            if generation == self._generation:
+                return text
+            
+            text = ''.join([
+                f'{prefix}{value}\n'
+                for (_, prefix), value in zip(self._line_prefixes, _export_values(self._values()))
+            ])
+            self._text_cache = (self._generation, text)
+            return text
+    
+    def export_prometheus_bytes(self) -> bytes:
+        """
+        导出 Prometheus 格式指标（UTF-8 字节）
         
-        lines.append(f'# HELP apexquant_orders_filled 已成交订单数')
-        lines.append(f'# TYPE apexquant_orders_filled counter')
-        lines.append(f'apexquant_orders_filled{{{label_str}}} {self.metrics["orders_filled"]}')
+        前缀已预先编码，每次只编码数值部分，HTTP 处理器可直接发送；
+        指标未更新时直接返回上次的结果
         
-        lines.append(f'# HELP apexquant_orders_rejected 已拒绝订单数')
-        lines.append(f'# TYPE apexquant_orders_rejected counter')
-        lines.append(f'apexquant_orders_rejected{{{label_str}}} {self.metrics["orders_rejected"]}')
+        Returns:
+            与 export_prometheus_format 相同内容的 UTF-8 字节
+        """
+        with self._lock:
+            generation, data = self._bytes_cache
+            if generation == self._generation:
+                return data
+            
+            data = b''.join([
+                prefix + f'{value}\n'.encode('utf-8')
+                for (_, prefix), value in zip(self._line_prefix_bytes, _export_values(self._values()))
+            ])
+            self._bytes_cache = (self._generation, data)
+            return data
+    
+    def iter_prometheus_bytes(self) -> Iterator[bytes]:
+        """
+        逐个指标生成 Prometheus 格式字节块
         
-        lines.append(f'# HELP apexquant_signal_count 信号数')
-        lines.append(f'# TYPE apexquant_signal_count counter')
-        lines.append(f'apexquant_signal_count{{{label_str}}} {self.metrics["signal_count"]}')
+        不在内存中拼接完整文本，可直接作为流式 HTTP 响应体，例如
+        Response(exporter.iter_prometheus_bytes(), mimetype='text/plain; version=0.0.4')
         
-        # 最后更新时间
-        lines.append(f'# HELP apexquant_last_update 最后更新时间戳')
-        lines.append(f'# TYPE apexquant_last_update gauge')
-        lines.append(f'apexquant_last_update{{{label_str}}} {self.metrics["last_update"]}')
+        Yields:
+            单个指标的 HELP/TYPE/样本行（UTF-8）
+        """
+        # 开始时在锁内取一次快照，生成过程中不持有锁
+        with self._lock:
+            prefixes = self._line_prefix_bytes
+            values = _export_values(self._values())
         
-        return '\n'.join(lines) + '\n'
+        for (_, prefix), value in zip(prefixes, values):
+            yield prefix + f'{value}\n'.encode('utf-8')
+    
+    def _values(self) -> list:
+        """全部指标值：[浮点指标..., 整数指标...]（调用方需持有锁）"""
+        return self._floats.tolist() + self._ints.tolist()
+    
+    @property
+    def metrics(self) -> Mapping:
+        """当前指标的只读快照，写入会抛出 TypeError（修改请使用 update_* 方法）"""
+        return MappingProxyType(self.get_metrics())
     
     def get_metrics(self) -> Dict:
         """获取当前指标"""
-        return self.metrics.copy()
-
+        with self._lock:
+            values = self._values()
+        return dict(zip(_METRIC_NAMES, _metric_values(values)))
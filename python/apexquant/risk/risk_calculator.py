@@ -5,16 +5,55 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
-import sys
-import os
+import warnings
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+from apexquant.risk import risk_kernels
+from apexquant.utils.jit_utils import NUMBA_AVAILABLE
 
-try:
-    import apexquant_core as aq
-    CORE_LOADED = True
-except ImportError:
-    CORE_LOADED = False
+# 回退路径一次计算的 VaR 左尾百分位：95%、99%
+_VAR_PERCENTILES = np.array([5.0, 1.0])
+
+# 风险等级评分边界：回撤 / VaR 每超过一档 +1 分，夏普每低于一档 +1 分
+_DD_EDGES = (0.1, 0.2, 0.3)
+_VAR_EDGES = (0.02, 0.03, 0.05)
+_SHARPE_EDGES = (0.5, 1.0)
+_RISK_SCORE_EDGES = (2, 4, 6)
+_RISK_LEVELS = ('low', 'medium', 'high', 'extreme')
+
+_fallback_warned = False
+
+
+@lru_cache(maxsize=None)
+def _core():
+    """首次使用时导入 C++ 核心模块，不可用时返回 None"""
+    try:
+        from apexquant import apexquant_core
+        return apexquant_core
+    except ImportError:
+        pass
+    
+    try:
+        import apexquant_core
+        return apexquant_core
+    except ImportError:
+        return None
+
+
+def _warn_fallback_once():
+    """C++ 核心模块不可用时提示一次（每个进程只提示一次）"""
+    global _fallback_warned
+    if _fallback_warned:
+        return
+    _fallback_warned = True
+    
+    backend = 'Numba' if NUMBA_AVAILABLE else 'NumPy'
+    warnings.warn(
+        f"C++ 核心模块未加载，RiskCalculator 使用 {backend} 回退实现",
+        RuntimeWarning,
+        stacklevel=3
+    )
 
 
 class RiskCalculator:
@@ -27,7 +66,11 @@ class RiskCalculator:
         Args:
             use_cpp: 是否使用 C++ 加速
         """
-        self.use_cpp = use_cpp and CORE_LOADED
+        self._aq = _core() if use_cpp else None
+        self.use_cpp = self._aq is not None
+        
+        if use_cpp and not self.use_cpp:
+            _warn_fallback_once()
     
     def calculate_all_metrics(self, 
                              result,
@@ -43,6 +86,7 @@ class RiskCalculator:
             风险指标字典
         """
         metrics = {}
+        aq = self._aq
         
         returns = result.daily_returns if hasattr(result, 'daily_returns') else []
         equity_curve = result.equity_curve if hasattr(result, 'equity_curve') else []
@@ -50,6 +94,15 @@ class RiskCalculator:
         if not returns or not equity_curve:
             return metrics
         
+        # Python 回退路径统一使用 float64 数组
+        if not self.use_cpp:
+            r = np.asarray(returns, dtype=np.float64)
+            eq = np.asarray(equity_curve, dtype=np.float64)
+            
+            # Sortino / Omega / 胜率 / 盈亏比共用一次遍历得到的汇总量
+            (total, gain_sum, n_gain,
+             loss_sum, n_loss, down_m2) = risk_kernels.return_stats(r)
+        
         # 基础指标
         metrics['total_return'] = result.total_return
         metrics['annual_return'] = result.annual_return
@@ -62,41 +115,23 @@ class RiskCalculator:
             metrics['cvar_95'] = aq.risk.conditional_var(returns, 0.95)
             metrics['cvar_99'] = aq.risk.conditional_var(returns, 0.99)
         else:
-            sorted_returns = np.sort(returns)
-            metrics['var_95'] = -np.percentile(sorted_returns, 5)
-            metrics['var_99'] = -np.percentile(sorted_returns, 1)
-            
-            var_95_threshold = np.percentile(sorted_returns, 5)
-            cvar_95_values = sorted_returns[sorted_returns <= var_95_threshold]
-            metrics['cvar_95'] = -np.mean(cvar_95_values) if len(cvar_95_values) > 0 else 0
-            
-            var_99_threshold = np.percentile(sorted_returns, 1)
-            cvar_99_values = sorted_returns[sorted_returns <= var_99_threshold]
-            metrics['cvar_99'] = -np.mean(cvar_99_values) if len(cvar_99_values) > 0 else 0
+            sorted_returns = np.sort(r)
+            (var_95, var_99), (cvar_95, cvar_99) = risk_kernels.var_cvar(
+                sorted_returns, _VAR_PERCENTILES
+            )
+            metrics['var_95'] = var_95
+            metrics['var_99'] = var_99
+            metrics['cvar_95'] = cvar_95
+            metrics['cvar_99'] = cvar_99
         
         # 回撤指标
         if self.use_cpp:
             metrics['max_drawdown'] = aq.risk.max_drawdown(equity_curve)
             metrics['max_dd_duration'] = aq.risk.max_drawdown_duration(equity_curve)
         else:
-            peak = equity_curve[0]
-            max_dd = 0
-            max_duration = 0
-            current_duration = 0
-            
-            for i, value in enumerate(equity_curve):
-                if value > peak:
-                    peak = value
-                    if current_duration > max_duration:
-                        max_duration = current_duration
-                    current_duration = 0
-                else:
-                    current_duration += 1
-                    dd = (peak - value) / peak
-                    max_dd = max(max_dd, dd)
-            
-            metrics['max_drawdown'] = max_dd
-            metrics['max_dd_duration'] = max_duration
+            max_dd, max_duration = risk_kernels.drawdown_stats(eq)
+            metrics['max_drawdown'] = float(max_dd)
+            metrics['max_dd_duration'] = int(max_duration)
         
         # Calmar 比率
         if self.use_cpp and metrics['max_drawdown'] > 0:
@@ -113,10 +148,9 @@ class RiskCalculator:
         if self.use_cpp:
             metrics['sortino_ratio'] = aq.risk.sortino_ratio(returns, 0.0, 252)
         else:
-            downside_returns = [r for r in returns if r < 0]
-            if downside_returns:
-                downside_std = np.std(downside_returns)
-                annual_return = np.mean(returns) * 252
+            if n_loss > 0:
+                downside_std = np.sqrt(down_m2 / n_loss)
+                annual_return = total / len(r) * 252
                 metrics['sortino_ratio'] = annual_return / (downside_std * np.sqrt(252))
             else:
                 metrics['sortino_ratio'] = 0.0
@@ -125,23 +159,17 @@ class RiskCalculator:
         if self.use_cpp:
             metrics['omega_ratio'] = aq.risk.omega_ratio(returns, 0.0)
         else:
-            gains = sum([max(0, r) for r in returns])
-            losses = sum([abs(min(0, r)) for r in returns])
-            metrics['omega_ratio'] = gains / losses if losses > 0 else float('inf')
+            metrics['omega_ratio'] = gain_sum / loss_sum if loss_sum > 0 else float('inf')
         
         # 胜率和盈亏比
         if self.use_cpp:
             metrics['win_rate'] = aq.risk.win_rate(returns)
             metrics['profit_loss_ratio'] = aq.risk.profit_loss_ratio(returns)
         else:
-            wins = sum(1 for r in returns if r > 0)
-            metrics['win_rate'] = wins / len(returns)
-            
-            profits = [r for r in returns if r > 0]
-            losses = [abs(r) for r in returns if r < 0]
+            metrics['win_rate'] = n_gain / len(r)
             
-            if profits and losses:
-                metrics['profit_loss_ratio'] = np.mean(profits) / np.mean(losses)
+            if n_gain > 0 and n_loss > 0:
+                metrics['profit_loss_ratio'] = (gain_sum / n_gain) / (loss_sum / n_loss)
             else:
                 metrics['profit_loss_ratio'] = 0.0
         
@@ -149,9 +177,7 @@ class RiskCalculator:
         if self.use_cpp:
             metrics['tail_ratio'] = aq.risk.tail_ratio(returns, 0.95)
         else:
-            upper = np.percentile(returns, 95)
-            lower = np.percentile(returns, 5)
-            metrics['tail_ratio'] = abs(upper / lower) if lower != 0 else 0
+            metrics['tail_ratio'] = risk_kernels.tail_ratio(sorted_returns)
         
         # 如果有基准收益率，计算 Alpha 和 Beta
         if benchmark_returns and len(benchmark_returns) == len(returns):
@@ -163,8 +189,8 @@ class RiskCalculator:
                 )
             else:
                 # Python 实现
-                returns_array = np.array(returns)
-                benchmark_array = np.array(benchmark_returns)
+                returns_array = r
+                benchmark_array = np.asarray(benchmark_returns, dtype=np.float64)
                 
                 covariance = np.cov(returns_array, benchmark_array)[0, 1]
                 benchmark_variance = np.var(benchmark_array)
@@ -195,40 +221,15 @@ class RiskCalculator:
         Returns:
             风险等级 'low', 'medium', 'high', 'extreme'
         """
-        risk_score = 0
-        
-        # 最大回撤评分
+        # 各指标按分档边界查找得分（bisect 对 NaN 与原比较语义一致，计 0 分）
         max_dd = metrics.get('max_drawdown', 0)
-        if max_dd > 0.3:
-            risk_score += 3
-        elif max_dd > 0.2:
-            risk_score += 2
-        elif max_dd > 0.1:
-            risk_score += 1
-        
-        # VaR 评分
         var_95 = metrics.get('var_95', 0)
-        if var_95 > 0.05:
-            risk_score += 3
-        elif var_95 > 0.03:
-            risk_score += 2
-        elif var_95 > 0.02:
-            risk_score += 1
-        
-        # 夏普比率评分（负面）
         sharpe = metrics.get('sharpe_ratio', 0)
-        if sharpe < 0.5:
-            risk_score += 2
-        elif sharpe < 1.0:
-            risk_score += 1
-        
-        # 综合评级
-        if risk_score >= 6:
-            return 'extreme'
-        elif risk_score >= 4:
-            return 'high'
-        elif risk_score >= 2:
-            return 'medium'
-        else:
-            return 'low'
-
+        
+        risk_score = (
+            bisect_left(_DD_EDGES, max_dd)
+            + bisect_left(_VAR_EDGES, var_95)
+            + len(_SHARPE_EDGES) - bisect_right(_SHARPE_EDGES, sharpe)  # 夏普越低得分越高
+        )
+        
+        return _RISK_LEVELS[bisect_right(_RISK_SCORE_EDGES, risk_score)]
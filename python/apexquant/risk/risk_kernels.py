@@ -0,0 +1,186 @@
+"""
+风险指标计算内核
+
+C++ 核心模块不可用时供 RiskCalculator 使用。
+安装 Numba 时使用 @njit 编译的单次遍历实现，否则使用等价的 NumPy 向量化实现。
+Numba 内核声明了显式签名，在导入时即完成编译（命中磁盘缓存时直接加载）。
+输入均为 float64 一维数组。
+"""
+
+import numpy as np
+
+from apexquant.utils.jit_utils import njit, NUMBA_AVAILABLE
+
+
+# ==================== 公共 ====================
+
+@njit('f8(f8[:], f8)', cache=True)
+def _sorted_percentile(sorted_values, percentile):
+    """已排序数组的百分位数（线性插值，与 np.percentile 默认方法一致；两种实现共用）"""
+    n = len(sorted_values)
+    pos = percentile / 100.0 * (n - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, n - 1)
+    t = pos - lo
+    a = sorted_values[lo]
+    b = sorted_values[hi]
+    diff = b - a
+    if t >= 0.5:
+        return b - diff * (1.0 - t)
+    return a + diff * t
+
+
+# ==================== NumPy 实现 ====================
+
+def _drawdown_stats_np(equity: np.ndarray):
+    """最大回撤及最大回撤持续时间（两次创新高之间的 K 线数，结尾未恢复的回撤不计）"""
+    peaks = np.maximum.accumulate(equity)
+    max_dd = max(0.0, float(((peaks - equity) / peaks).max()))
+
+    new_peak_idx = np.flatnonzero(equity[1:] > peaks[:-1]) + 1
+    if len(new_peak_idx) > 0:
+        durations = np.diff(new_peak_idx, prepend=-1) - 1
+        max_duration = int(durations.max())
+    else:
+        max_duration = 0
+
+    return max_dd, max_duration
+
+
+def _var_cvar_np(sorted_returns: np.ndarray, percentiles: np.ndarray):
+    """
+    由已排序收益率一次计算多个置信度的 VaR/CVaR
+
+    percentiles 为左尾百分位数组（如 [5, 1] 对应 95%/99% VaR），
+    CVaR 为不高于阈值部分的均值，借助前缀和计算
+    """
+    thresholds = np.percentile(sorted_returns, percentiles)
+    counts = np.searchsorted(sorted_returns, thresholds, side='right')
+    prefix_sums = np.cumsum(sorted_returns)
+
+    cvars = np.zeros(len(counts))
+    has_tail = counts > 0
+    cvars[has_tail] = -prefix_sums[counts[has_tail] - 1] / counts[has_tail]
+    return -thresholds, cvars
+
+
+def _return_stats_np(returns: np.ndarray):
+    """
+    收益率汇总量：(总和, 盈利和, 盈利次数, 亏损绝对值和, 亏损次数, 亏损离差平方和)
+
+    亏损离差平方和以亏损收益自身均值为中心，用于 Sortino 的下行标准差
+    """
+    gains = returns[returns > 0]
+    losses = returns[returns < 0]
+    down_m2 = ((losses - losses.mean()) ** 2).sum() if len(losses) > 0 else 0.0
+    return (returns.sum(), gains.sum(), len(gains),
+            -losses.sum(), len(losses), down_m2)
+
+
+def _tail_ratio_np(sorted_returns: np.ndarray):
+    """由已排序收益率计算尾部比率 |P95 / P5|"""
+    upper = _sorted_percentile(sorted_returns, 95.0)
+    lower = _sorted_percentile(sorted_returns, 5.0)
+    return abs(upper / lower) if lower != 0 else 0
+
+
+# ==================== Numba 实现 ====================
+
+@njit('Tuple((f8, i8))(f8[:])', cache=True, error_model='numpy')
+def _drawdown_stats_nb(equity):
+    peak = equity[0]
+    max_dd = 0.0
+    max_duration = 0
+    current_duration = 0
+
+    for i in range(len(equity)):
+        value = equity[i]
+        if value > peak:
+            peak = value
+            if current_duration > max_duration:
+                max_duration = current_duration
+            current_duration = 0
+        else:
+            current_duration += 1
+            dd = (peak - value) / peak
+            if dd > max_dd:
+                max_dd = dd
+
+    return max_dd, max_duration
+
+
+@njit('Tuple((f8[:], f8[:]))(f8[:], f8[:])', cache=True, error_model='numpy')
+def _var_cvar_nb(sorted_returns, percentiles):
+    m = len(percentiles)
+    thresholds = np.empty(m)
+    for k in range(m):
+        thresholds[k] = _sorted_percentile(sorted_returns, percentiles[k])
+    max_threshold = thresholds.max()
+
+    # 单次遍历前缀，遇到各阈值边界时记录前缀和
+    sums = np.zeros(m)
+    counts = np.zeros(m, dtype=np.int64)
+    total = 0.0
+    for i in range(len(sorted_returns)):
+        x = sorted_returns[i]
+        if x > max_threshold:
+            break
+        total += x
+        for k in range(m):
+            if x <= thresholds[k]:
+                sums[k] = total
+                counts[k] = i + 1
+
+    cvars = np.zeros(m)
+    for k in range(m):
+        if counts[k] > 0:
+            cvars[k] = -sums[k] / counts[k]
+    return -thresholds, cvars
+
+
+@njit('Tuple((f8, f8, i8, f8, i8, f8))(f8[:])', cache=True, error_model='numpy')
+def _return_stats_nb(returns):
+    total = 0.0
+    gain_sum = 0.0
+    n_gain = 0
+    loss_sum = 0.0
+    n_loss = 0
+    down_mean = 0.0
+    down_m2 = 0.0
+
+    # 单次遍历；亏损部分的离差平方和用 Welford 在线算法累计
+    for i in range(len(returns)):
+        x = returns[i]
+        total += x
+        if x > 0:
+            gain_sum += x
+            n_gain += 1
+        elif x < 0:
+            loss_sum -= x
+            n_loss += 1
+            delta = x - down_mean
+            down_mean += delta / n_loss
+            down_m2 += delta * (x - down_mean)
+
+    return total, gain_sum, n_gain, loss_sum, n_loss, down_m2
+
+
+@njit('f8(f8[:])', cache=True, error_model='numpy')
+def _tail_ratio_nb(sorted_returns):
+    upper = _sorted_percentile(sorted_returns, 95.0)
+    lower = _sorted_percentile(sorted_returns, 5.0)
+    return abs(upper / lower) if lower != 0 else 0.0
+
+
+# ==================== 导出 ====================
+
+if NUMBA_AVAILABLE:
+    drawdown_stats = _drawdown_stats_nb
+    var_cvar = _var_cvar_nb
+    return_stats = _return_stats_nb
+    tail_ratio = _tail_ratio_nb
+else:
+    drawdown_stats = _drawdown_stats_np
+    var_cvar = _var_cvar_np
+    return_stats = _return_stats_np
+    tail_ratio = _tail_ratio_np
@@ -3,10 +3,6 @@ AI 风险报告生成器
 """
 
 from typing import Dict, Optional
-import sys
-import os
-
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
 from apexquant.ai import DeepSeekClient
 
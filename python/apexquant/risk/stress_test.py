@@ -5,10 +5,6 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
-import sys
-import os
-
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
 from apexquant.ai import DeepSeekClient
 
@@ -16,8 +12,16 @@ from apexquant.ai import DeepSeekClient
 class StressTestGenerator:
     """压力测试场景生成器"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        """初始化"""
+    def __init__(self, api_key: Optional[str] = None, seed: Optional[int] = None):
+        """
+        初始化
+        
+        Args:
+            api_key: DeepSeek API 密钥
+            seed: 随机种子，指定后场景噪声可复现
+        """
+        self._rng = np.random.default_rng(seed)
+        
         try:
             self.client = DeepSeekClient(api_key)
             self.ai_enabled = True
@@ -97,29 +101,32 @@ class StressTestGenerator:
         Returns:
             压力测试后的数据
         """
-        stressed_data = data.copy()
-        
         shock = scenario.get('shock', 0)
         vol_multiplier = scenario.get('volatility_multiplier', 1.0)
         duration = scenario.get('duration', len(data))
         
+        # OHLC 取出为 (N, 4) float64 数组统一处理，最后一次性写回
+        ohlc_cols = ['open', 'high', 'low', 'close']
+        ohlc = data[ohlc_cols].to_numpy(dtype=np.float64, copy=True)
+        
         # 应用冲击
         if shock != 0:
-            for col in ['open', 'high', 'low', 'close']:
-                stressed_data[col] = stressed_data[col] * (1 + shock)
+            ohlc *= (1 + shock)
         
-        # 增加波动率
-        if vol_multiplier > 1.0:
-            for i in range(1, min(duration, len(stressed_data))):
-                noise = np.random.normal(0, 0.02 * vol_multiplier)
-                for col in ['open', 'high', 'low', 'close']:
-                    stressed_data.loc[i, col] = stressed_data.loc[i, col] * (1 + noise)
+        # 增加波动率：第 1 ~ n-1 根 K 线各取一个噪声，同一根 K 线的 OHLC 共用
+        n = min(duration, len(ohlc))
+        if vol_multiplier > 1.0 and n > 1:
+            noise = self._rng.standard_normal(n - 1) * (0.02 * vol_multiplier)
+            ohlc[1:n] *= (1 + noise)[:, None]
         
         # 确保 OHLC 逻辑一致
-        for i in range(len(stressed_data)):
-            row = stressed_data.iloc[i]
-            stressed_data.loc[i, 'high'] = max(row['open'], row['close'], row['high'])
-            stressed_data.loc[i, 'low'] = min(row['open'], row['close'], row['low'])
+        body_high = np.maximum(ohlc[:, 0], ohlc[:, 3])
+        body_low = np.minimum(ohlc[:, 0], ohlc[:, 3])
+        np.maximum(body_high, ohlc[:, 1], out=ohlc[:, 1])
+        np.minimum(body_low, ohlc[:, 2], out=ohlc[:, 2])
+        
+        stressed_data = data.copy()
+        stressed_data[ohlc_cols] = ohlc
         
         return stressed_data
     
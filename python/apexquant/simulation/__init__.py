@@ -11,7 +11,7 @@ __version__ = "1.0.0"
 # 核心模块
 from .database import DatabaseManager, create_database
 from .simulation_controller import SimulationController, SimulationMode
-from .config import SimulationConfig, get_config
+from .config import SimulationConfig, get_config, reset_config
 from .trading_calendar import TradingCalendar, get_calendar
 
 # 数据源
@@ -49,6 +49,7 @@ __all__ = [
     'SimulationMode',
     'SimulationConfig',
     'get_config',
+    'reset_config',
     'TradingCalendar',
     'get_calendar',
     
@@ -0,0 +1,37 @@
+"""
+模拟盘指标内核 AOT 编译
+
+用 numba.pycc 将 indicators_njit 中的内核预编译为 _sim_kernels 扩展模块，
+CLI 每次启动时直接加载，不再付出 JIT 编译的冷启动开销。
+
+用法：
+    python apexquant/simulation/_build_kernels.py    # 在本目录生成扩展
+    pip install .                                     # setup.py 安装时自动编译（需安装 Numba）
+"""
+
+import os
+import sys
+
+from numba.pycc import CC
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+# 按顶层模块导入，避免触发 simulation 包的 __init__
+from indicators_njit import (
+    _update_ma_rsi,
+    _update_ma_rsi_rows,
+    UPDATE_MA_RSI_SIGNATURE,
+    UPDATE_MA_RSI_ROWS_SIGNATURE,
+)
+
+cc = CC('_sim_kernels')
+cc.output_dir = _HERE
+cc.export('update_ma_rsi', UPDATE_MA_RSI_SIGNATURE)(_update_ma_rsi)
+cc.export('update_ma_rsi_rows', UPDATE_MA_RSI_ROWS_SIGNATURE)(_update_ma_rsi_rows)
+
+
+if __name__ == "__main__":
+    cc.compile()
+    print(f"[SUCCESS] {os.path.join(cc.output_dir, cc.output_file)}")
@@ -4,12 +4,15 @@ ApexQuant AI交易顾问
 集成DeepSeek API提供智能交易建议
 """
 
+import asyncio
 import json
 import logging
 import os
+import re
 import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Deque, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -22,15 +25,73 @@ except ImportError:
 
 # 尝试导入OpenAI库（DeepSeek API兼容）
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
+    import httpx
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
     logger.warning("openai library not available, AI advisor disabled")
 
+# orjson 解析更快，未安装时使用标准库（orjson.JSONDecodeError 是 json.JSONDecodeError 的子类）
+try:
+    import orjson
+    _json_loads = orjson.loads
+    ORJSON_AVAILABLE = True
+except ImportError:
+    _json_loads = json.loads
+    ORJSON_AVAILABLE = False
+
+# HTTP/2 需要 h2 库，未安装时使用 HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 from .config import get_config
 from .database import DatabaseManager
 
+# 响应中的JSON对象：优先取 markdown 代码块内的内容，否则取第一个 { 到最后一个 }
+_JSON_RE = re.compile(r"```(?:json)?\s*(\{.*\})\s*```|(\{.*\})", re.S)
+
+# 流式响应中提前识别的字段（confidence 需后跟分隔符，确保数字已完整）
+_ACTION_RE = re.compile(r'"action"\s*:\s*"(\w+)"')
+_CONFIDENCE_RE = re.compile(r'"confidence"\s*:\s*"?(-?[0-9.]+)"?\s*[,}\n]')
+
+# 系统消息：所有请求共用同一对象，且位于消息开头，便于服务端前缀缓存命中
+_SYSTEM_MSG = {
+    "role": "system",
+    "content": "You are a professional quantitative trading AI. Always respond with valid JSON only, no markdown or extra text."
+}
+
+# prompt 末尾的输出格式说明
+_SIGNAL_FORMAT = """
+Based on above information, provide trading advice. Respond in JSON format (no markdown):
+{
+  "action": "BUY" or "SELL" or "HOLD",
+  "volume": suggested quantity,
+  "confidence": 0.0-1.0 confidence score,
+  "reasoning": "brief reason (max 30 words)",
+  "risk_level": "LOW" or "MEDIUM" or "HIGH"
+}
+"""
+
+_BATCH_SIGNAL_FORMAT = """
+Based on above information, provide trading advice for EVERY symbol. Respond in JSON format (no markdown):
+{
+  "signals": [
+    {
+      "symbol": symbol code,
+      "action": "BUY" or "SELL" or "HOLD",
+      "volume": suggested quantity,
+      "confidence": 0.0-1.0 confidence score,
+      "reasoning": "brief reason (max 30 words)",
+      "risk_level": "LOW" or "MEDIUM" or "HIGH"
+    }
+  ]
+}
+"""
+
 
 class AITradingAdvisor:
     """AI交易顾问"""
@@ -59,21 +120,46 @@ class AITradingAdvisor:
         self.call_interval_minutes = ai_config.get('call_interval_minutes', 5)
         self.daily_call_limit = ai_config.get('daily_call_limit', 100)
         self.confidence_threshold = ai_config.get('confidence_threshold', 0.7)
+        self.batch_size = max(1, ai_config.get('batch_size', 5))
+        self.max_concurrency = max(1, ai_config.get('max_concurrency', 3))
         
         # 状态
         self.last_call_time: Optional[datetime] = None
+        self._last_call_monotonic: Optional[float] = None
         self.daily_calls = 0
         self.last_reset_date = datetime.now().date()
-        self.call_history: List[Dict] = []
+        # 调用记录只保留最近 call_history_size 条；累计统计由计数器维护
+        self.call_history: Deque[Dict] = deque(maxlen=ai_config.get('call_history_size', 1000))
+        self._total_calls = 0
+        self._total_tokens = 0
+        
+        # 信号缓存：相同行情快照在有效期内直接复用，不重复调用API
+        self.signal_cache_size = ai_config.get('signal_cache_size', 256)
+        self.signal_cache_ttl = self.call_interval_minutes * 60
+        self._signal_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # 异步客户端及并发信号量按需创建（信号量绑定到所在事件循环）
+        self.aclient = None
+        self._sem = None
+        self._sem_loop = None
         
-        # 初始化客户端
+        # 初始化客户端（共享连接池，复用 TCP/TLS 连接）
+        self._http = None
         if self.api_key:
+            self._http = httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=self._http_limits()
+            )
             self.client = OpenAI(
                 api_key=self.api_key,
                 base_url=self.base_url,
-                timeout=self.timeout
+                timeout=self.timeout,
+                http_client=self._http
             )
-            logger.info(f"AI advisor initialized with model: {self.model}")
+            logger.info("AI advisor initialized with model: %s", self.model)
         else:
             logger.warning(
                 "API key not found. Please set DEEPSEEK_API_KEY environment variable "
@@ -94,23 +180,29 @@ class AITradingAdvisor:
         if not self.client:
             return False
         
-        if current_time is None:
+        # 未传入时间时为实时调用，间隔用单调时钟判断
+        realtime = current_time is None
+        if realtime:
             current_time = datetime.now()
         
         # 检查日期是否变更，重置计数
-        if current_time.date() != self.last_reset_date:
+        today = current_time.date()
+        if today != self.last_reset_date:
             self.daily_calls = 0
-            self.last_reset_date = current_time.date()
+            self.last_reset_date = today
         
         # 检查每日调用限制
         if self.daily_calls >= self.daily_call_limit:
-            logger.warning(f"Daily call limit reached: {self.daily_calls}/{self.daily_call_limit}")
+            logger.warning("Daily call limit reached: %d/%d", self.daily_calls, self.daily_call_limit)
             return False
         
         # 检查调用间隔
         if self.last_call_time:
-            elapsed = (current_time - self.last_call_time).total_seconds() / 60
-            if elapsed < self.call_interval_minutes:
+            if realtime:
+                elapsed = time.monotonic() - self._last_call_monotonic
+            else:
+                elapsed = (current_time - self.last_call_time).total_seconds()
+            if elapsed < self.call_interval_minutes * 60:
                 return False
         
         return True
@@ -144,16 +236,22 @@ class AITradingAdvisor:
             return self._default_signal("AI client not available")
         
         try:
+            # 持仓只查一次，缓存键和prompt共用
+            position = self._positions_by_symbol(account_info).get(symbol, {})
+            
+            # 相同行情快照直接返回缓存信号
+            cache_key = self._signal_cache_key(symbol, market_data, position, news)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            
             # 构造prompt
-            prompt = self._build_prompt(symbol, market_data, account_info, news)
+            prompt = self._build_prompt(symbol, market_data, account_info, position, news)
             
             # 调用API
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a professional quantitative trading AI. Always respond with valid JSON only, no markdown or extra text."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=[_SYSTEM_MSG, {"role": "user", "content": prompt}],
                 temperature=0.3,
                 max_tokens=500
             )
@@ -161,125 +259,532 @@ class AITradingAdvisor:
             # 解析响应
             content = response.choices[0].message.content
             signal = self._parse_json_response(content)
+            self._cache_put(cache_key, signal)
+            
+            # 记录调用
+            self._record_call(response, prompt, signal, symbol=symbol)
+            
+            logger.info("AI signal: %s (confidence: %.2f)", signal['action'], signal['confidence'])
+            
+            return signal
+            
+        except Exception as e:
+            logger.error("AI API error: %s", e)
+            return self._default_signal(f"API error: {str(e)}")
+    
+    def generate_trading_signals(
+        self,
+        symbols: List[str],
+        market_data_map: Dict[str, Dict],
+        account_info: Dict,
+        news: List[str] = None
+    ) -> Dict[str, Dict]:
+        """
+        批量生成交易信号
+        
+        每 batch_size 个股票合并为一次API调用，返回JSON数组后按股票代码拆分
+        
+        Args:
+            symbols: 股票代码列表
+            market_data_map: {symbol: 市场数据}
+            account_info: 账户信息
+            news: 新闻列表（可选）
+            
+        Returns:
+            {symbol: 信号字典}，格式同 generate_trading_signal
+        """
+        if not self.client:
+            return {symbol: self._default_signal("AI client not available") for symbol in symbols}
+        
+        positions = self._positions_by_symbol(account_info)
+        signals = {}
+        for start in range(0, len(symbols), self.batch_size):
+            batch = symbols[start:start + self.batch_size]
+            
+            try:
+                # 构造prompt
+                prompt = self._build_batch_prompt(batch, market_data_map, account_info, positions, news)
+                
+                # 调用API
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[_SYSTEM_MSG, {"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    max_tokens=500 * len(batch)
+                )
+                
+                # 解析响应
+                content = response.choices[0].message.content
+                batch_signals = self._parse_batch_response(content, batch)
+                
+                # 记录调用（一次调用计一次）
+                self._record_call(response, prompt, batch_signals, symbols=batch)
+                
+                logger.info("AI batch signals for %d symbols", len(batch))
+                
+            except Exception as e:
+                logger.error("AI API error: %s", e)
+                batch_signals = {symbol: self._default_signal(f"API error: {str(e)}") for symbol in batch}
+            
+            signals.update(batch_signals)
+        
+        return signals
+    
+    def stream_trading_signal(
+        self,
+        symbol: str,
+        market_data: Dict,
+        account_info: Dict,
+        news: List[str] = None,
+        on_provisional: Callable[[Dict], None] = None
+    ) -> Dict:
+        """
+        以流式响应生成交易信号
+        
+        响应中 action 和 confidence 一旦解析出来即调用 on_provisional，
+        调用方可提前开始风控检查；完整响应结束后返回最终信号
+        
+        Args:
+            symbol: 股票代码
+            market_data: 市场数据
+            account_info: 账户信息
+            news: 新闻列表（可选）
+            on_provisional: 回调，参数为 {'action': str, 'confidence': float}，至多调用一次
+            
+        Returns:
+            信号字典，格式同 generate_trading_signal
+        """
+        if not self.client:
+            return self._default_signal("AI client not available")
+        
+        try:
+            # 持仓只查一次，缓存键和prompt共用
+            position = self._positions_by_symbol(account_info).get(symbol, {})
+            
+            # 相同行情快照直接返回缓存信号
+            cache_key = self._signal_cache_key(symbol, market_data, position, news)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # 构造prompt
+            prompt = self._build_prompt(symbol, market_data, account_info, position, news)
+            
+            # 调用API（流式，最后一个分片携带 token 用量）
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=[_SYSTEM_MSG, {"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=500,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            
+            parts = []
+            last_chunk = None
+            provisional_sent = on_provisional is None
+            for chunk in stream:
+                last_chunk = chunk
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                
+                # 尚未回调时检查是否已收到 action 和 confidence
+                if not provisional_sent:
+                    text = "".join(parts)
+                    action = _ACTION_RE.search(text)
+                    confidence = _CONFIDENCE_RE.search(text)
+                    if action and confidence:
+                        provisional_sent = True
+                        on_provisional({
+                            'action': action.group(1).upper(),
+                            'confidence': float(confidence.group(1))
+                        })
+            
+            # 解析响应
+            signal = self._parse_json_response("".join(parts))
+            self._cache_put(cache_key, signal)
             
             # 记录调用
-            self.last_call_time = datetime.now()
-            self.daily_calls += 1
+            self._record_call(last_chunk, prompt, signal, symbol=symbol)
+            
+            logger.info("AI signal: %s (confidence: %.2f)", signal['action'], signal['confidence'])
+            
+            return signal
+            
+        except Exception as e:
+            logger.error("AI API error: %s", e)
+            return self._default_signal(f"API error: {str(e)}")
+    
+    async def agenerate_trading_signal(
+        self,
+        symbol: str,
+        market_data: Dict,
+        account_info: Dict,
+        news: List[str] = None
+    ) -> Dict:
+        """
+        异步生成交易信号
+        
+        参数与返回值同 generate_trading_signal；并发请求数受 max_concurrency 限制，
+        多个股票可用 asyncio.gather 同时等待
+        """
+        position = self._positions_by_symbol(account_info).get(symbol, {})
+        return await self._agenerate_signal(symbol, market_data, account_info, position, news)
+    
+    async def _agenerate_signal(
+        self,
+        symbol: str,
+        market_data: Dict,
+        account_info: Dict,
+        position: Dict,
+        news: List[str] = None
+    ) -> Dict:
+        """异步生成单个股票的信号，持仓由调用方查好传入"""
+        if not self.client:
+            return self._default_signal("AI client not available")
+        
+        try:
+            # 相同行情快照直接返回缓存信号
+            cache_key = self._signal_cache_key(symbol, market_data, position, news)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # 构造prompt
+            prompt = self._build_prompt(symbol, market_data, account_info, position, news)
             
-            tokens_used = response.usage.total_tokens if hasattr(response, 'usage') else 0
+            # 调用API
+            async with self._get_semaphore():
+                response = await self._get_async_client().chat.completions.create(
+                    model=self.model,
+                    messages=[_SYSTEM_MSG, {"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    max_tokens=500
+                )
             
-            self.call_history.append({
-                'timestamp': int(time.time()),
-                'symbol': symbol,
-                'prompt_length': len(prompt),
-                'response': signal,
-                'tokens_used': tokens_used
-            })
+            # 解析响应
+            content = response.choices[0].message.content
+            signal = self._parse_json_response(content)
+            self._cache_put(cache_key, signal)
             
-            logger.info(f"AI signal: {signal['action']} (confidence: {signal['confidence']:.2f})")
+            # 记录调用
+            self._record_call(response, prompt, signal, symbol=symbol)
+            
+            logger.info("AI signal: %s (confidence: %.2f)", signal['action'], signal['confidence'])
             
             return signal
             
         except Exception as e:
-            logger.error(f"AI API error: {e}")
+            logger.error("AI API error: %s", e)
             return self._default_signal(f"API error: {str(e)}")
     
+    async def agenerate_trading_signals(
+        self,
+        symbols: List[str],
+        market_data_map: Dict[str, Dict],
+        account_info: Dict,
+        news: List[str] = None
+    ) -> Dict[str, Dict]:
+        """
+        异步生成多个股票的交易信号
+        
+        各股票的请求并发发出（受 max_concurrency 限制），总耗时约为单次调用耗时
+        
+        Args:
+            symbols: 股票代码列表
+            market_data_map: {symbol: 市场数据}
+            account_info: 账户信息
+            news: 新闻列表（可选）
+            
+        Returns:
+            {symbol: 信号字典}
+        """
+        positions = self._positions_by_symbol(account_info)
+        results = await asyncio.gather(*(
+            self._agenerate_signal(
+                symbol, market_data_map.get(symbol, {}), account_info, positions.get(symbol, {}), news
+            )
+            for symbol in symbols
+        ))
+        return dict(zip(symbols, results))
+    
+    def close(self):
+        """关闭同步客户端的连接池，之后不再调用AI"""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        self.client = None
+    
+    async def aclose(self):
+        """关闭异步客户端的连接池"""
+        if self.aclient is not None:
+            await self.aclient.close()
+            self.aclient = None
+    
+    def _http_limits(self) -> "httpx.Limits":
+        """连接池大小"""
+        return httpx.Limits(max_keepalive_connections=8, max_connections=16)
+    
+    def _get_async_client(self):
+        """按需创建异步客户端"""
+        if self.aclient is None:
+            self.aclient = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                http_client=httpx.AsyncClient(
+                    http2=HTTP2_AVAILABLE,
+                    timeout=self.timeout,
+                    limits=self._http_limits()
+                )
+            )
+        return self.aclient
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """当前事件循环的并发信号量"""
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+            self._sem_loop = loop
+        return self._sem
+    
+    def _signal_cache_key(
+        self,
+        symbol: str,
+        market_data: Dict,
+        position: Dict,
+        news: List[str] = None
+    ) -> tuple:
+        """信号缓存键：股票代码、取整后的价格与指标、是否持仓、新闻"""
+        return (
+            symbol,
+            round(market_data.get('price', 0), 2),
+            round(market_data.get('ma5', 0), 2),
+            round(market_data.get('ma20', 0), 2),
+            round(market_data.get('rsi', 0), 1),
+            position.get('volume', 0) > 0,
+            tuple(news[:3]) if news else (),
+        )
+    
+    def _cache_get(self, key: tuple) -> Optional[Dict]:
+        """查询信号缓存，过期或未命中返回 None"""
+        entry = self._signal_cache.get(key)
+        if entry is not None:
+            cached_at, signal = entry
+            if time.monotonic() - cached_at < self.signal_cache_ttl:
+                self._signal_cache.move_to_end(key)
+                self.cache_hits += 1
+                return dict(signal)
+            del self._signal_cache[key]
+        
+        self.cache_misses += 1
+        return None
+    
+    def _cache_put(self, key: tuple, signal: Dict):
+        """写入信号缓存，超出容量时淘汰最久未使用的条目"""
+        self._signal_cache[key] = (time.monotonic(), dict(signal))
+        self._signal_cache.move_to_end(key)
+        while len(self._signal_cache) > self.signal_cache_size:
+            self._signal_cache.popitem(last=False)
+    
+    def _record_call(self, response, prompt: str, result: Dict, **target):
+        """
+        记录一次API调用
+        
+        Args:
+            response: API响应
+            prompt: 发送的prompt
+            result: 解析后的信号
+            target: symbol=... 或 symbols=[...]
+        """
+        self.last_call_time = datetime.now()
+        self._last_call_monotonic = time.monotonic()
+        self.daily_calls += 1
+        
+        usage = getattr(response, 'usage', None)
+        tokens_used = usage.total_tokens if usage else 0
+        self._total_calls += 1
+        self._total_tokens += tokens_used
+        
+        self.call_history.append({
+            'timestamp': int(time.time()),
+            **target,
+            'prompt_length': len(prompt),
+            'response': result,
+            'tokens_used': tokens_used
+        })
+    
     def _build_prompt(
         self,
         symbol: str,
         market_data: Dict,
         account_info: Dict,
+        position: Dict,
         news: List[str] = None
     ) -> str:
         """构造prompt"""
-        # 获取持仓信息
-        positions = {p['symbol']: p for p in account_info['positions']}
-        position = positions.get(symbol, {})
+        # 各段依次放入列表，最后一次拼接
+        parts = [
+            "You are a quantitative trading AI. Respond with JSON only.\n"
+            "\n"
+            "Current Market:\n",
+            self._build_market_block(symbol, market_data),
+            "\n"
+            "Account Status:\n"
+            f"Total Assets: {account_info['total_assets']:.0f}\n"
+            f"Available Cash: {account_info['available_cash']:.0f}\n"
+            f"Position: {self._position_summary(position)}\n",
+            self._build_news_block(news),
+            _SIGNAL_FORMAT,
+        ]
+        return "".join(parts)
+    
+    def _build_batch_prompt(
+        self,
+        symbols: List[str],
+        market_data_map: Dict[str, Dict],
+        account_info: Dict,
+        positions: Dict[str, Dict],
+        news: List[str] = None
+    ) -> str:
+        """构造多股票合并prompt"""
+        parts = [
+            "You are a quantitative trading AI. Respond with JSON only.\n"
+            "\n"
+            "Account Status:\n"
+            f"Total Assets: {account_info['total_assets']:.0f}\n"
+            f"Available Cash: {account_info['available_cash']:.0f}\n"
+        ]
         
-        has_position = position.get('volume', 0) > 0
-        position_summary = f"{position['volume']} shares at cost {position.get('avg_cost', 0):.2f}" if has_position else "No position"
+        # 每个股票一个区块
+        for symbol in symbols:
+            parts.append(f"\n### SYMBOL: {symbol}\n")
+            parts.append(self._build_market_block(symbol, market_data_map.get(symbol, {})))
+            parts.append(f"Position: {self._position_summary(positions.get(symbol, {}))}\n")
         
-        # 构造简洁的prompt
-        prompt = f"""You are a quantitative trading AI. Respond with JSON only.
-
-Current Market:
-Stock: {symbol}
-Price: {market_data.get('price', 0):.2f}
-"""
+        parts.append(self._build_news_block(news))
+        parts.append(_BATCH_SIGNAL_FORMAT)
+        return "".join(parts)
+    
+    def _build_market_block(self, symbol: str, market_data: Dict) -> str:
+        """单个股票的行情与技术指标文本"""
+        parts = [f"Stock: {symbol}\nPrice: {market_data.get('price', 0):.2f}\n"]
         
         # 添加技术指标（如果有）
         if 'ma5' in market_data:
-            prompt += f"MA5: {market_data['ma5']:.2f}, MA20: {market_data.get('ma20', 0):.2f}\n"
+            parts.append(f"MA5: {market_data['ma5']:.2f}, MA20: {market_data.get('ma20', 0):.2f}\n")
         
         if 'rsi' in market_data:
-            prompt += f"RSI: {market_data['rsi']:.1f}\n"
-        
-        prompt += f"""
-Account Status:
-Total Assets: {account_info['total_assets']:.0f}
-Available Cash: {account_info['available_cash']:.0f}
-Position: {position_summary}
-"""
+            parts.append(f"RSI: {market_data['rsi']:.1f}\n")
         
-        # 添加新闻（如果有）
-        if news:
-            prompt += f"\nRecent News:\n"
-            for item in news[:3]:  # 最多3条
-                prompt += f"- {item}\n"
+        return "".join(parts)
+    
+    def _position_summary(self, position: Dict) -> str:
+        """单个股票的持仓描述"""
+        has_position = position.get('volume', 0) > 0
+        return f"{position['volume']} shares at cost {position.get('avg_cost', 0):.2f}" if has_position else "No position"
+    
+    def _positions_by_symbol(self, account_info: Dict) -> Dict[str, Dict]:
+        """
+        按股票代码索引持仓（同一代码出现多次时取最后一条）
         
-        prompt += """
-Based on above information, provide trading advice. Respond in JSON format (no markdown):
-{
-  "action": "BUY" or "SELL" or "HOLD",
-  "volume": suggested quantity,
-  "confidence": 0.0-1.0 confidence score,
-  "reasoning": "brief reason (max 30 words)",
-  "risk_level": "LOW" or "MEDIUM" or "HIGH"
-}
-"""
+        每次信号调用构建一次，不缓存也不修改调用方的 account_info
+        """
+        return {position['symbol']: position for position in account_info['positions']}
+    
+    def _build_news_block(self, news: List[str] = None) -> str:
+        """新闻文本（最多3条）"""
+        if not news:
+            return ""
         
-        return prompt
+        parts = ["\nRecent News:\n"]
+        parts.extend(f"- {item}\n" for item in news[:3])  # 最多3条
+        return "".join(parts)
     
     def _parse_json_response(self, text: str) -> Dict:
         """解析JSON响应"""
         try:
-            # 移除可能的markdown标记
-            text = text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.startswith('```'):
-                text = text[3:]
-            if text.endswith('```'):
-                text = text[:-3]
-            text = text.strip()
-            
-            # 解析JSON
-            data = json.loads(text)
-            
-            # 验证必需字段
-            required_fields = ['action', 'confidence']
-            for field in required_fields:
-                if field not in data:
-                    logger.warning(f"Missing field: {field}")
-                    return self._default_signal("Invalid response format")
-            
-            # 标准化
-            return {
-                'action': data.get('action', 'HOLD').upper(),
-                'volume': int(data.get('volume', 0)),
-                'confidence': float(data.get('confidence', 0)),
-                'reasoning': str(data.get('reasoning', 'No reasoning provided')),
-                'risk_level': data.get('risk_level', 'MEDIUM').upper()
-            }
+            data = self._load_json(text)
+            return self._normalize_signal(data)
             
         except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error: {e}")
-            logger.debug(f"Response text: {text}")
+            logger.error("JSON parse error: %s", e)
+            logger.debug("Response text: %s", text)
             return self._default_signal("JSON parse error")
         except Exception as e:
-            logger.error(f"Parse error: {e}")
+            logger.error("Parse error: %s", e)
             return self._default_signal(f"Parse error: {str(e)}")
     
+    def _parse_batch_response(self, text: str, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        解析批量JSON响应
+        
+        接受 {"signals": [...]}，单个股票时也接受单个信号对象；
+        响应中缺失的股票返回默认HOLD信号
+        """
+        try:
+            data = self._load_json(text)
+            
+            if isinstance(data, dict) and 'signals' in data:
+                items = data['signals']
+            elif isinstance(data, dict) and len(symbols) == 1:
+                items = [dict(data, symbol=data.get('symbol', symbols[0]))]
+            else:
+                logger.warning("Missing field: signals")
+                items = []
+            
+            # 按股票代码索引
+            by_symbol = {
+                str(item.get('symbol')): item
+                for item in items if isinstance(item, dict)
+            }
+            
+            signals = {}
+            for symbol in symbols:
+                if symbol in by_symbol:
+                    signals[symbol] = self._normalize_signal(by_symbol[symbol])
+                else:
+                    signals[symbol] = self._default_signal("Symbol missing in response")
+            return signals
+            
+        except json.JSONDecodeError as e:
+            logger.error("JSON parse error: %s", e)
+            logger.debug("Response text: %s", text)
+            return {symbol: self._default_signal("JSON parse error") for symbol in symbols}
+        except Exception as e:
+            logger.error("Parse error: %s", e)
+            return {symbol: self._default_signal(f"Parse error: {str(e)}") for symbol in symbols}
+    
+    def _load_json(self, text: str):
+        """提取响应中的JSON对象（容忍markdown标记及前后说明文字）并解析"""
+        match = _JSON_RE.search(text)
+        payload = (match.group(1) or match.group(2)) if match else text
+        
+        # 解析JSON
+        return _json_loads(payload)
+    
+    def _normalize_signal(self, data: Dict) -> Dict:
+        """验证并标准化单个信号"""
+        # 验证必需字段
+        required_fields = ['action', 'confidence']
+        for field in required_fields:
+            if field not in data:
+                logger.warning("Missing field: %s", field)
+                return self._default_signal("Invalid response format")
+        
+        # 标准化
+        return {
+            'action': data.get('action', 'HOLD').upper(),
+            'volume': int(data.get('volume', 0)),
+            'confidence': float(data.get('confidence', 0)),
+            'reasoning': str(data.get('reasoning', 'No reasoning provided')),
+            'risk_level': data.get('risk_level', 'MEDIUM').upper()
+        }
+    
     def _default_signal(self, reason: str) -> Dict:
         """返回默认HOLD信号"""
         return {
@@ -292,19 +797,23 @@ Based on above information, provide trading advice. Respond in JSON format (no m
     
     def get_statistics(self) -> Dict:
         """获取调用统计"""
-        total_calls = len(self.call_history)
-        total_tokens = sum(h.get('tokens_used', 0) for h in self.call_history)
+        total_calls = self._total_calls
+        total_tokens = self._total_tokens
         
         if total_calls > 0:
             avg_tokens = total_tokens / total_calls
         else:
             avg_tokens = 0
         
+        cache_lookups = self.cache_hits + self.cache_misses
+        cache_hit_rate = self.cache_hits / cache_lookups if cache_lookups > 0 else 0.0
+        
         return {
             'total_calls': total_calls,
             'daily_calls': self.daily_calls,
             'total_tokens': total_tokens,
-            'avg_tokens_per_call': round(avg_tokens, 1)
+            'avg_tokens_per_call': round(avg_tokens, 1),
+            'cache_hit_rate': round(cache_hit_rate, 3)
         }
 
 
@@ -13,11 +13,7 @@ from datetime import datetime
 # 设置路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from simulation import (
-    SimulationController,
-    SimulationMode,
-    get_config,
-)
+# simulation 包（pandas、C++ 模块等）在各命令处理函数中按需导入，--help 无需加载
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +33,8 @@ def setup_logging(log_level: str = "INFO"):
 
 def run_backtest(args):
     """运行回测"""
+    from simulation import SimulationController, get_config
+    
     print("\n" + "="*60)
     print("ApexQuant Backtest Mode")
     print("="*60)
@@ -76,29 +74,46 @@ def run_backtest(args):
         print(f"[ERROR] Unknown strategy: {args.strategy}")
         return 1
     
+    # 全部股票的收盘价矩阵，每日对有数据的股票一次性计算 MA5/MA20/RSI14 随 bar 传给策略
+    import numpy as np
+    from simulation.indicators_njit import CloseMatrix, update_ma_rsi_rows
+    close_matrix = CloseMatrix(symbols, keep=20)
+    
     # 定义回测策略包装函数
     def backtest_strategy(controller, date, daily_data):
         """回测策略包装"""
+        bars = []
         for symbol, df in daily_data.items():
-            if not df.empty:
+            if not df.empty and symbol in close_matrix.index:
                 bar = df.iloc[-1].to_dict()
                 bar['symbol'] = symbol
-                account_info = controller.get_account_info()
-                
-                # 调用策略
-                signal = strategy_func(controller, bar, account_info)
-                
-                # 处理信号
-                if signal:
-                    action = signal.get('action')
-                    if action in ['buy', 'sell']:
-                        controller.submit_order(
-                            symbol=signal['symbol'],
-                            side=action,
-                            order_type=signal.get('order_type', 'limit'),
-                            volume=signal.get('volume', 100),
-                            price=signal.get('price', bar.get('close', 0))
-                        )
+                bars.append(bar)
+        if not bars:
+            return
+        
+        rows = np.array([close_matrix.index[bar['symbol']] for bar in bars], dtype=np.int64)
+        close_matrix.push(rows, np.array([bar['close'] for bar in bars], dtype=np.float64))
+        indicators = update_ma_rsi_rows(close_matrix.closes, close_matrix.counts, rows, 5, 20, 14)
+        
+        # 下单会改变资金和持仓，策略仍按股票依次调用
+        for bar, (ma5, ma20, rsi14) in zip(bars, indicators.tolist()):
+            bar['ma5'], bar['ma20'], bar['rsi14'] = ma5, ma20, rsi14
+            account_info = controller.get_account_info()
+            
+            # 调用策略
+            signal = strategy_func(controller, bar, account_info)
+            
+            # 处理信号
+            if signal:
+                action = signal.get('action')
+                if action in ['buy', 'sell']:
+                    controller.submit_order(
+                        symbol=signal['symbol'],
+                        side=action,
+                        order_type=signal.get('order_type', 'limit'),
+                        volume=signal.get('volume', 100),
+                        price=signal.get('price', bar.get('close', 0))
+                    )
     
     # 启动回测
     try:
@@ -123,6 +138,8 @@ def run_backtest(args):
 
 def run_realtime(args):
     """运行实时模拟"""
+    from simulation import SimulationController, get_config
+    
     print("\n" + "="*60)
     print("ApexQuant Realtime Simulation Mode")
     print("="*60)
@@ -201,6 +218,8 @@ def run_realtime(args):
 
 def show_account(args):
     """显示账户信息"""
+    from simulation import SimulationController, get_config
+    
     config = get_config(args.config)
     controller = SimulationController(config)
     
@@ -237,7 +256,7 @@ def show_account(args):
 
 def show_performance(args):
     """显示绩效报告"""
-    from simulation import PerformanceAnalyzer
+    from simulation import PerformanceAnalyzer, get_config
     from simulation.database import DatabaseManager
     
     config = get_config(args.config)
@@ -4,31 +4,86 @@ ApexQuant Simulation Configuration Manager
 """
 
 import os
+import json
+import hashlib
+import threading
 import yaml
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 优先使用 libyaml 的 C 实现，未编译 libyaml 时退回纯 Python 实现
+try:
+    from yaml import CSafeLoader as _SafeLoader, CSafeDumper as _SafeDumper
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader, SafeDumper as _SafeDumper
+
+# fastjsonschema 将校验规则编译为 Python 函数，未安装时使用逐项检查
+try:
+    import fastjsonschema
+    FASTJSONSCHEMA_AVAILABLE = True
+except ImportError:
+    FASTJSONSCHEMA_AVAILABLE = False
+
+# 解析 JSON 缓存时优先使用 orjson
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+# 必需的配置节
+_REQUIRED_SECTIONS = [
+    "account", "data_source", "risk_control",
+    "ai_advisor", "database"
+]
+
+# 配置校验规则（与 validate 中的逐项检查等价）
+_CONFIG_SCHEMA = {
+    "type": "object",
+    "required": _REQUIRED_SECTIONS,
+    "properties": {
+        "account": {
+            "type": "object",
+            "required": ["initial_capital"],
+            "properties": {
+                "initial_capital": {"type": "number", "exclusiveMinimum": 0},
+                "commission_rate": {"type": "number", "minimum": 0, "maximum": 0.01},  # 费率不应超过1%
+            },
+        },
+    },
+}
+
+_validate_schema = fastjsonschema.compile(_CONFIG_SCHEMA) if FASTJSONSCHEMA_AVAILABLE else None
+
+# YAML 解析结果的 JSON 缓存默认目录：<项目根目录>/data/cache/config
+_DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent.parent / "data" / "cache" / "config"
+
 
 class SimulationConfig:
     """模拟盘配置管理器"""
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, cache_dir: Optional[str] = None):
         """
         初始化配置管理器
         
         Args:
             config_path: 配置文件路径，默认为 config/simulation_config.yaml
+            cache_dir: JSON 缓存目录，默认为 data/cache/config
         """
         if config_path is None:
-            # 默认配置文件路径
-            project_root = Path(__file__).parent.parent.parent.parent
-            config_path = project_root / "config" / "simulation_config.yaml"
+            config_path = _default_config_path()
         
         self.config_path = Path(config_path)
+        self.cache_dir = Path(cache_dir) if cache_dir else _DEFAULT_CACHE_DIR
         self.config: Dict[str, Any] = {}
+        # 点号路径 -> 配置值（含中间层字典），供 get 单次查表；首次 get 时构建
+        self._flat: Optional[Dict[str, Any]] = None
+        # 点号路径 -> (父节点字典, 末级键)，供 set 免逐级查找
+        self._parents: Dict[str, Tuple[Dict[str, Any], str]] = {}
         
         # 加载配置
         self.load_config()
@@ -42,12 +97,82 @@ class SimulationConfig:
             self.save_config()
         else:
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    self.config = yaml.safe_load(f)
+                stat = self.config_path.stat()
+                cached = self._load_json_cache(stat)
+                if cached is not None:
+                    self.config = cached
+                else:
+                    # 原始字节交给 YAML 解析器自行解码，不经文本流
+                    raw = self.config_path.read_bytes()
+                    self.config = yaml.load(raw, Loader=_SafeLoader)
+                    self._save_json_cache(stat)
                 logger.info(f"Config loaded from {self.config_path}")
             except Exception as e:
                 logger.error(f"Failed to load config: {e}, using default config")
                 self.config = self._get_default_config()
+        
+        self._invalidate_index()
+    
+    def _flatten(self) -> Dict[str, Any]:
+        """按当前配置构建点号路径索引"""
+        flat = {}
+        
+        def walk(prefix: str, node: Dict[str, Any]) -> None:
+            for key, value in node.items():
+                if not isinstance(key, str):
+                    continue
+                path = prefix + key
+                flat[path] = value
+                if isinstance(value, dict):
+                    walk(path + '.', value)
+        
+        if isinstance(self.config, dict):
+            walk('', self.config)
+        self._flat = flat
+        return flat
+    
+    @property
+    def cache_path(self) -> Path:
+        """YAML 解析结果的 JSON 缓存文件（缓存目录下，按配置文件绝对路径区分）"""
+        digest = hashlib.sha1(str(self.config_path.resolve()).encode('utf-8')).hexdigest()[:16]
+        return self.cache_dir / f"{self.config_path.stem}-{digest}.json"
+    
+    def _load_json_cache(self, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """
+        读取 JSON 缓存
+        
+        缓存首行记录生成时配置文件的 [mtime_ns, size]，与当前不一致时视为失效
+        
+        Returns:
+            缓存的配置，缓存不存在或已失效时返回 None
+        """
+        try:
+            with open(self.cache_path, 'rb') as f:
+                header = f.readline()
+                if _json_loads(header) != [stat.st_mtime_ns, stat.st_size]:
+                    return None
+                return _json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+    
+    def _save_json_cache(self, stat: os.stat_result) -> None:
+        """写入 JSON 缓存；配置含 JSON 无法原样表示的值（如日期）时不写"""
+        try:
+            body = json.dumps(self.config, ensure_ascii=False)
+            if json.loads(body) != self.config:
+                return
+            
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            
+            # 先写临时文件再替换，避免并发读到写了一半的缓存
+            tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps([stat.st_mtime_ns, stat.st_size]))
+                f.write('\n')
+                f.write(body)
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.debug(f"Config cache not written: {e}")
     
     def save_config(self) -> None:
         """保存配置到文件"""
@@ -56,7 +181,7 @@ class SimulationConfig:
             self.config_path.parent.mkdir(parents=True, exist_ok=True)
             
             with open(self.config_path, 'w', encoding='utf-8') as f:
-                yaml.dump(self.config, f, allow_unicode=True, default_flow_style=False)
+                yaml.dump(self.config, f, Dumper=_SafeDumper, allow_unicode=True, default_flow_style=False)
             logger.info(f"Config saved to {self.config_path}")
         except Exception as e:
             logger.error(f"Failed to save config: {e}")
@@ -150,17 +275,20 @@ class SimulationConfig:
         Returns:
             配置值
         """
-        keys = key_path.split('.')
-        value = self.config
-        
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return default
-        
+        flat = self._flat
+        if flat is None:
+            flat = self._flatten()
+        value = flat.get(key_path, default)
+        if isinstance(value, dict):
+            # 调用方可能直接修改返回的配置节，之后的索引需重建
+            self._invalidate_index()
         return value
     
+    def _invalidate_index(self) -> None:
+        """丢弃路径索引和 set 的父节点缓存"""
+        self._flat = None
+        self._parents.clear()
+    
     def set(self, key_path: str, value: Any) -> None:
         """
         设置配置项
@@ -169,34 +297,57 @@ class SimulationConfig:
             key_path: 配置路径
             value: 配置值
         """
-        keys = key_path.split('.')
-        config = self.config
-        
-        # 导航到最后一级
-        for key in keys[:-1]:
-            if key not in config:
-                config[key] = {}
-            config = config[key]
+        entry = self._parents.get(key_path)
+        if entry is None:
+            keys = key_path.split('.')
+            config = self.config
+            
+            # 导航到最后一级，缺失的中间层补为空字典
+            created = False
+            for key in keys[:-1]:
+                if key not in config:
+                    config[key] = {}
+                    created = True
+                config = config[key]
+            
+            if created:
+                self._flat = None
+            entry = (config, keys[-1])
         
         # 设置值
-        config[keys[-1]] = value
+        config, key = entry
+        old_value = config[key] if key in config else None
+        config[key] = value
+        self._parents[key_path] = entry
+        
+        if isinstance(old_value, dict) or isinstance(value, dict):
+            # 替换了整棵子树，下级路径的缓存失效
+            self._invalidate_index()
+        elif self._flat is not None:
+            self._flat[key_path] = value
+        
         logger.debug(f"Config updated: {key_path} = {value}")
     
+    def _section(self, name: str) -> Dict[str, Any]:
+        """返回配置节（可被调用方修改，因此使索引失效）"""
+        self._invalidate_index()
+        return self.config.get(name, {})
+    
     def get_account_config(self) -> Dict[str, Any]:
         """获取账户配置"""
-        return self.config.get("account", {})
+        return self._section("account")
     
     def get_risk_config(self) -> Dict[str, Any]:
         """获取风控配置"""
-        return self.config.get("risk_control", {})
+        return self._section("risk_control")
     
     def get_ai_config(self) -> Dict[str, Any]:
         """获取AI配置"""
-        return self.config.get("ai_advisor", {})
+        return self._section("ai_advisor")
     
     def get_data_source_config(self) -> Dict[str, Any]:
         """获取数据源配置"""
-        return self.config.get("data_source", {})
+        return self._section("data_source")
     
     def validate(self) -> bool:
         """
@@ -205,12 +356,18 @@ class SimulationConfig:
         Returns:
             True if valid, False otherwise
         """
-        required_sections = [
-            "account", "data_source", "risk_control", 
-            "ai_advisor", "database"
-        ]
+        if _validate_schema is not None:
+            # 整个配置一次校验
+            try:
+                _validate_schema(self.config)
+            except fastjsonschema.JsonSchemaException as e:
+                logger.error(f"Invalid config: {e}")
+                return False
+            
+            logger.info("Config validation passed")
+            return True
         
-        for section in required_sections:
+        for section in _REQUIRED_SECTIONS:
             if section not in self.config:
                 logger.error(f"Missing required config section: {section}")
                 return False
@@ -231,23 +388,40 @@ class SimulationConfig:
         return True
 
 
-# 全局配置实例
-_global_config: Optional[SimulationConfig] = None
+# 全局配置实例，按配置文件绝对路径缓存
+_config_cache: Dict[Path, SimulationConfig] = {}
+_config_lock = threading.Lock()
+
+
+def _default_config_path() -> Path:
+    """默认配置文件路径：config/simulation_config.yaml"""
+    project_root = Path(__file__).parent.parent.parent.parent
+    return project_root / "config" / "simulation_config.yaml"
 
 
 def get_config(config_path: Optional[str] = None) -> SimulationConfig:
     """
     获取全局配置实例（单例模式）
     
+    同一配置文件在进程内只解析一次，之后返回同一实例
+    
     Args:
-        config_path: 配置文件路径
+        config_path: 配置文件路径，默认为 config/simulation_config.yaml
         
     Returns:
         配置实例
     """
-    global _global_config
+    key = Path(config_path or _default_config_path()).resolve()
     
-    if _global_config is None or config_path is not None:
-        _global_config = SimulationConfig(config_path)
+    with _config_lock:
+        config = _config_cache.get(key)
+        if config is None:
+            config = _config_cache[key] = SimulationConfig(key)
     
-    return _global_config
+    return config
+
+
+def reset_config() -> None:
+    """清空全局配置缓存，之后的 get_config 重新加载配置文件"""
+    with _config_lock:
+        _config_cache.clear()
@@ -4,11 +4,17 @@ ApexQuant Data Source Adapter for Simulation
 """
 
 import sys
+import json
+import os
+import time
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import datetime
 import threading
-from typing import Optional, List
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, List, Tuple, Dict
 import logging
 
 # 导入已有的多数据源模块
@@ -21,17 +27,122 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 交易所日历（可选），可不经网络直接得到上交所交易日
+try:
+    import exchange_calendars
+    EXCHANGE_CALENDARS_AVAILABLE = True
+except ImportError:
+    EXCHANGE_CALENDARS_AVAILABLE = False
+
+# 磁盘缓存默认目录：用户缓存目录下的 apexquant（$XDG_CACHE_HOME 或 ~/.cache），
+# 与包的安装位置无关；可通过 cache_dir 参数配置
+_DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "apexquant"
+
+# 由指数日线得到的交易日缓存文件名 {"开始|结束": [日期, ...]}
+_TRADING_DAYS_CACHE_NAME = "trading_days.json"
+
+# K线磁盘缓存子目录，每个 (数据源, 复权方式, 股票, 区间, 频率) 一个 npz 文件
+_STOCK_DATA_CACHE_SUBDIR = "stock_data"
+
+# K线磁盘缓存有效期（秒）：前复权价格会随之后的分红送转变化，不能永久缓存
+_STOCK_DATA_CACHE_TTL = 24 * 3600
+
+# 数据源使用的复权方式（baostock adjustflag=2 / akshare adjust=qfq，均为前复权）
+_ADJUST = "qfq"
+
+# 进程内K线缓存的最大条数
+_STOCK_DATA_CACHE_SIZE = 512
+
+# bar_to_tick 使用的随机数生成器
+_tick_rng = np.random.default_rng()
+
+# 列名映射
+_COLUMN_MAPPING = {
+    '日期': 'date',
+    '开盘价': 'open',
+    '最高价': 'high',
+    '最低价': 'low',
+    '收盘价': 'close',
+    '成交量': 'volume',
+    '成交额': 'amount',
+    'code': 'symbol',
+    '代码': 'symbol',
+}
+
+# 必要的列
+_REQUIRED_COLUMNS = frozenset(('date', 'open', 'high', 'low', 'close', 'volume'))
+
+# 实时行情中可作为最新价的列（按优先级）
+_PRICE_COLUMNS = ('current', 'price', 'last_price', 'close')
+
+
+@lru_cache(maxsize=8192)
+def _normalize_symbol(symbol: str) -> str:
+    """
+    标准化股票代码（结果缓存，实时行情每轮的代码基本相同）
+    
+    Args:
+        symbol: 原始股票代码
+        
+    Returns:
+        标准化后的代码
+    """
+    # 去除空格
+    symbol = symbol.strip()
+    
+    # 如果已经有市场前缀，直接返回
+    if '.' in symbol:
+        return symbol
+    
+    # 根据代码判断市场
+    if symbol.startswith('6'):
+        # 上海主板
+        return f"sh.{symbol}"
+    elif symbol.startswith('0') or symbol.startswith('3'):
+        # 深圳主板/创业板
+        return f"sz.{symbol}"
+    else:
+        # 默认深圳
+        return f"sz.{symbol}"
+
+
+@lru_cache(maxsize=None)
+def _exchange_sessions(start_date: str, end_date: str) -> Optional[Tuple[str, ...]]:
+    """
+    上交所交易日（exchange_calendars）
+    
+    Returns:
+        'YYYY-MM-DD' 元组；未安装 exchange_calendars 或超出日历范围时返回 None
+    """
+    if not EXCHANGE_CALENDARS_AVAILABLE:
+        return None
+    
+    try:
+        sessions = exchange_calendars.get_calendar("XSHG").sessions_in_range(start_date, end_date)
+    except Exception as e:
+        logger.debug(f"Exchange calendar unavailable for {start_date}~{end_date}: {e}")
+        return None
+    return tuple(sessions.strftime('%Y-%m-%d'))
+
 
 class SimulationDataSource:
     """模拟盘数据源适配器（线程安全）"""
     
-    def __init__(self, primary_source: str = "baostock", backup_source: str = "akshare"):
+    def __init__(
+        self,
+        primary_source: str = "baostock",
+        backup_source: str = "akshare",
+        symbols: Optional[List[str]] = None,
+        cache_dir: Optional[str] = None
+    ):
         """
         初始化数据源
         
         Args:
             primary_source: 主数据源
             backup_source: 备用数据源
+            symbols: 预先已知的股票池（可选），用于预热代码标准化缓存
+            cache_dir: 磁盘缓存目录，默认为 ~/.cache/apexquant
         """
         self.fetcher = MultiSourceDataFetcher(
             primary_source=primary_source,
@@ -41,10 +152,20 @@ class SimulationDataSource:
         # 添加线程锁保证并发安全
         self._lock = threading.RLock()
         
-        # 缓存，避免重复请求
-        self._cache = {}
+        # 磁盘缓存目录；K线缓存键包含数据源，切换数据源不会读到其他来源的数据
+        self.cache_dir = Path(cache_dir) if cache_dir else _DEFAULT_CACHE_DIR
+        self._source_tag = f"{primary_source}-{backup_source}"
+        
+        # 缓存，避免重复请求（按最近使用淘汰）
+        self._cache: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
         self._cache_lock = threading.Lock()
         
+        # 实时行情的价格列名，首次解析后缓存
+        self._price_col = None
+        
+        if symbols:
+            self._normalize_symbols(symbols)
+        
         logger.info(f"Data source initialized: primary={primary_source}, backup={backup_source}")
     
     def get_stock_data(
@@ -72,12 +193,19 @@ class SimulationDataSource:
         symbol = self._normalize_symbol(symbol)
         
         # 检查缓存
-        cache_key = f"{symbol}_{start_date}_{end_date}_{freq}"
+        cache_key = f"{self._source_tag}_{_ADJUST}_{symbol}_{start_date}_{end_date}_{freq}"
         if use_cache:
             with self._cache_lock:
                 if cache_key in self._cache:
+                    self._cache.move_to_end(cache_key)
                     logger.debug(f"Cache hit for {cache_key}")
                     return self._cache[cache_key].copy()
+            
+            df = self._load_stock_data_cache(cache_key)
+            if df is not None:
+                logger.debug(f"Disk cache hit for {cache_key}")
+                self._remember_stock_data(cache_key, df)
+                return df
         
         # 使用锁保护数据获取
         with self._lock:
@@ -89,10 +217,11 @@ class SimulationDataSource:
                     df = self._standardize_columns(df)
                     logger.debug(f"Fetched {len(df)} rows for {symbol}")
                     
-                    # 缓存结果
+                    # 缓存结果，已结束的区间数据不会再变，同时写入磁盘
                     if use_cache:
-                        with self._cache_lock:
-                            self._cache[cache_key] = df.copy()
+                        self._remember_stock_data(cache_key, df)
+                        if end_date < datetime.date.today().strftime('%Y-%m-%d'):
+                            self._save_stock_data_cache(cache_key, df)
                     
                     return df
                 else:
@@ -103,6 +232,69 @@ class SimulationDataSource:
                 logger.error(f"Failed to fetch stock data for {symbol}: {e}")
                 return None
     
+    def _remember_stock_data(self, cache_key: str, df: pd.DataFrame) -> None:
+        """放入进程内缓存，超出容量时淘汰最久未用的条目"""
+        with self._cache_lock:
+            self._cache[cache_key] = df.copy()
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > _STOCK_DATA_CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
+    @property
+    def _stock_data_cache_dir(self) -> Path:
+        """K线磁盘缓存目录"""
+        return self.cache_dir / _STOCK_DATA_CACHE_SUBDIR
+    
+    def _load_stock_data_cache(self, cache_key: str) -> Optional[pd.DataFrame]:
+        """读取K线磁盘缓存，不存在、过期或损坏时返回None"""
+        path = self._stock_data_cache_dir / f"{cache_key}.npz"
+        try:
+            if time.time() - path.stat().st_mtime > _STOCK_DATA_CACHE_TTL:
+                return None
+            
+            # 不允许 pickle，缓存文件只能包含数值/字符串数组
+            with np.load(path, allow_pickle=False) as data:
+                columns = data['columns'].tolist()
+                return pd.DataFrame({name: data[f"c{i}"] for i, name in enumerate(columns)})
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Stock data cache not read: {path}: {e}")
+            return None
+    
+    def _save_stock_data_cache(self, cache_key: str, df: pd.DataFrame) -> None:
+        """写入K线磁盘缓存（含无法存为数值/字符串数组的列时不缓存）"""
+        arrays = {'columns': np.array([str(c) for c in df.columns])}
+        for i, col in enumerate(df.columns):
+            values = df[col].to_numpy()
+            if values.dtype.kind not in 'biufmM':
+                if not all(isinstance(v, str) for v in values):
+                    return
+                values = values.astype(str)
+            arrays[f"c{i}"] = values
+        
+        try:
+            cache_dir = self._stock_data_cache_dir
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            path = cache_dir / f"{cache_key}.npz"
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Stock data cache not written: {e}")
+    
+    def clear_cache(self) -> None:
+        """清空K线缓存（进程内和磁盘），数据源更新后调用"""
+        with self._cache_lock:
+            self._cache.clear()
+        
+        for path in self._stock_data_cache_dir.glob("*.npz"):
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.debug(f"Stock data cache not removed: {path}: {e}")
+    
     def get_realtime_quotes(self, symbols: List[str]) -> Optional[pd.DataFrame]:
         """
         获取实时行情（线程安全）
@@ -117,7 +309,7 @@ class SimulationDataSource:
         with self._lock:
             try:
                 # 标准化股票代码
-                symbols = [self._normalize_symbol(s) for s in symbols]
+                symbols = self._normalize_symbols(symbols)
                 
                 df = self.fetcher.get_realtime_quotes(symbols)
                 
@@ -132,6 +324,53 @@ class SimulationDataSource:
                 logger.error(f"Failed to fetch realtime quotes: {e}")
                 return None
     
+    def get_latest_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        批量获取最新价格（一次实时行情请求）
+        
+        Args:
+            symbols: 股票代码列表
+            
+        Returns:
+            {标准化代码: 最新价格}，获取失败的股票不在结果中
+        """
+        try:
+            symbols = self._normalize_symbols(symbols)
+            quotes = self.get_realtime_quotes(symbols)
+            
+            if quotes is None or quotes.empty:
+                return {}
+            
+            # 价格列名各数据源固定，解析一次后复用
+            col = self._price_col
+            if col not in quotes.columns:
+                col = next((c for c in _PRICE_COLUMNS if c in quotes.columns), None)
+                if col is None:
+                    logger.warning(f"No price column found in realtime quotes for {symbols}")
+                    return {}
+                self._price_col = col
+            
+            # 停牌等非数值价格（如 '-'）逐行置为 NaN 后剔除，不影响其他股票
+            prices = pd.to_numeric(quotes[col], errors='coerce')
+            
+            # 单只股票按位置取第一行，不依赖行情中的代码格式
+            if len(symbols) == 1:
+                price = prices.iloc[0]
+                return {} if pd.isna(price) else {symbols[0]: float(price)}
+            
+            valid = prices.notna().to_numpy()
+            for key in ('symbol', 'code'):
+                if key in quotes.columns:
+                    codes = self._normalize_symbols(quotes[key].astype(str)[valid])
+                    return dict(zip(codes, prices[valid].astype(float).tolist()))
+            
+            logger.warning("No symbol column found in realtime quotes")
+            return {}
+            
+        except Exception as e:
+            logger.error(f"Failed to get latest prices for {symbols}: {e}")
+            return {}
+    
     def get_latest_price(self, symbol: str) -> Optional[float]:
         """
         获取最新价格
@@ -142,25 +381,8 @@ class SimulationDataSource:
         Returns:
             最新价格，如果失败返回None
         """
-        try:
-            symbol = self._normalize_symbol(symbol)
-            quotes = self.get_realtime_quotes([symbol])
-            
-            if quotes is not None and not quotes.empty:
-                # 尝试获取价格列
-                price_columns = ['current', 'price', 'last_price', 'close']
-                for col in price_columns:
-                    if col in quotes.columns:
-                        return float(quotes.iloc[0][col])
-                
-                logger.warning(f"No price column found in realtime quotes for {symbol}")
-                return None
-            else:
-                return None
-                
-        except Exception as e:
-            logger.error(f"Failed to get latest price for {symbol}: {e}")
-            return None
+        symbol = self._normalize_symbol(symbol)
+        return self.get_latest_prices([symbol]).get(symbol)
     
     def get_stock_info(self, symbol: str) -> Optional[dict]:
         """
@@ -197,23 +419,19 @@ class SimulationDataSource:
         Returns:
             标准化后的代码
         """
-        # 去除空格
-        symbol = symbol.strip()
-        
-        # 如果已经有市场前缀，直接返回
-        if '.' in symbol:
-            return symbol
-        
-        # 根据代码判断市场
-        if symbol.startswith('6'):
-            # 上海主板
-            return f"sh.{symbol}"
-        elif symbol.startswith('0') or symbol.startswith('3'):
-            # 深圳主板/创业板
-            return f"sz.{symbol}"
-        else:
-            # 默认深圳
-            return f"sz.{symbol}"
+        return _normalize_symbol(symbol)
+    
+    def _normalize_symbols(self, symbols: List[str]) -> List[str]:
+        """
+        批量标准化股票代码
+        
+        Args:
+            symbols: 原始股票代码列表
+            
+        Returns:
+            标准化后的代码列表
+        """
+        return list(map(_normalize_symbol, symbols))
     
     def _standardize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -225,27 +443,14 @@ class SimulationDataSource:
         Returns:
             标准化后的DataFrame
         """
-        # 列名映射
-        column_mapping = {
-            '日期': 'date',
-            '开盘价': 'open',
-            '最高价': 'high',
-            '最低价': 'low',
-            '收盘价': 'close',
-            '成交量': 'volume',
-            '成交额': 'amount',
-            'code': 'symbol',
-            '代码': 'symbol',
-        }
-        
-        # 重命名列
-        df = df.rename(columns=column_mapping)
+        # 重命名列（已是标准列名时跳过）
+        if not _COLUMN_MAPPING.keys().isdisjoint(df.columns):
+            df = df.set_axis([_COLUMN_MAPPING.get(c, c) for c in df.columns], axis=1)
         
         # 确保必要的列存在
-        required_columns = ['date', 'open', 'high', 'low', 'close', 'volume']
-        for col in required_columns:
-            if col not in df.columns:
-                logger.warning(f"Missing required column: {col}")
+        if not _REQUIRED_COLUMNS.issubset(df.columns):
+            missing = sorted(_REQUIRED_COLUMNS.difference(df.columns))
+            logger.warning(f"Missing required columns: {missing}")
         
         return df
     
@@ -260,6 +465,16 @@ class SimulationDataSource:
         Returns:
             交易日列表
         """
+        sessions = _exchange_sessions(start_date, end_date)
+        if sessions is not None:
+            return list(sessions)
+        
+        # 已结束的区间交易日不会再变，优先读磁盘缓存
+        cache_key = f"{start_date}|{end_date}"
+        cached = self._load_trading_days_cache()
+        if cache_key in cached:
+            return list(cached[cache_key])
+        
         try:
             # 使用某个股票的日线数据来获取交易日
             # 选择一个稳定存在的股票，如上证指数
@@ -268,6 +483,8 @@ class SimulationDataSource:
             if df is not None and not df.empty and 'date' in df.columns:
                 dates = df['date'].tolist()
                 logger.debug(f"Fetched {len(dates)} trading days")
+                if end_date < datetime.date.today().strftime('%Y-%m-%d'):
+                    self._save_trading_days_cache(cached, cache_key, dates)
                 return dates
             else:
                 logger.warning("Failed to fetch trading days")
@@ -276,6 +493,29 @@ class SimulationDataSource:
         except Exception as e:
             logger.error(f"Failed to fetch trading days: {e}")
             return []
+    
+    def _load_trading_days_cache(self) -> dict:
+        """读取交易日磁盘缓存，不存在或损坏时返回空字典"""
+        try:
+            with open(self.cache_dir / _TRADING_DAYS_CACHE_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_trading_days_cache(self, cached: dict, cache_key: str, dates: List[str]) -> None:
+        """写入交易日磁盘缓存（仅缓存字符串日期）"""
+        if not all(isinstance(d, str) for d in dates):
+            return
+        
+        try:
+            cache_path = self.cache_dir / _TRADING_DAYS_CACHE_NAME
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({**cached, cache_key: dates}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.debug(f"Trading days cache not written: {e}")
 
 
 def create_data_source(config: dict) -> SimulationDataSource:
@@ -290,8 +530,15 @@ def create_data_source(config: dict) -> SimulationDataSource:
     """
     primary = config.get("primary", "baostock")
     backup = config.get("backup", "akshare")
+    symbols = config.get("symbols")
+    cache_dir = config.get("cache_dir")
     
-    return SimulationDataSource(primary_source=primary, backup_source=backup)
+    return SimulationDataSource(
+        primary_source=primary,
+        backup_source=backup,
+        symbols=symbols,
+        cache_dir=cache_dir
+    )
 
 
 class MockDataSource:
@@ -308,6 +555,9 @@ class MockDataSource:
         self.num_days = num_days
         self.initial_price = initial_price
         
+        # 实时行情/最新价的随机数生成器（K线每次按固定种子重新生成）
+        self._rng = np.random.default_rng(42)
+        
         # 添加线程锁
         self._lock = threading.RLock()
         
@@ -332,8 +582,6 @@ class MockDataSource:
         Returns:
             DataFrame with columns: date, open, high, low, close, volume
         """
-        import numpy as np
-        
         # 使用锁保护数据生成
         with self._lock:
             try:
@@ -346,33 +594,29 @@ class MockDataSource:
                 if len(dates) > self.num_days:
                     dates = dates[:self.num_days]
                 
-                # 生成随机游走价格
-                np.random.seed(42)  # 固定种子以便测试
-                returns = np.random.normal(0.001, 0.02, len(dates))  # 日均收益0.1%，波动2%
-                prices = self.initial_price * np.cumprod(1 + returns)
+                # 生成随机游走价格（固定种子以便测试，不影响全局随机状态）
+                n = len(dates)
+                rng = np.random.default_rng(42)
+                returns = rng.normal(0.001, 0.02, n)  # 日均收益0.1%，波动2%
+                close = self.initial_price * np.cumprod(1 + returns)
                 
-                # 生成OHLC数据
-                data = []
-                for i, (date, close) in enumerate(zip(dates, prices)):
-                    # 生成开高低收
-                    daily_volatility = close * 0.02  # 2%日内波动
-                    open_price = close * (1 + np.random.normal(0, 0.005))
-                    high = max(open_price, close) * (1 + abs(np.random.normal(0, 0.01)))
-                    low = min(open_price, close) * (1 - abs(np.random.normal(0, 0.01)))
-                    
-                    # 生成成交量
-                    volume = np.random.randint(1000000, 10000000)
-                    
-                    data.append({
-                        'date': date.strftime('%Y-%m-%d'),
-                        'open': round(open_price, 2),
-                        'high': round(high, 2),
-                        'low': round(low, 2),
-                        'close': round(close, 2),
-                        'volume': volume
-                    })
-            
-                df = pd.DataFrame(data)
+                # 整列生成开高低收
+                z = rng.standard_normal((3, n))
+                open_price = close * (1 + 0.005 * z[0])
+                high = np.maximum(open_price, close) * (1 + np.abs(0.01 * z[1]))
+                low = np.minimum(open_price, close) * (1 - np.abs(0.01 * z[2]))
+                
+                # 生成成交量
+                volume = rng.integers(1000000, 10000000, n)
+                
+                df = pd.DataFrame({
+                    'date': dates.strftime('%Y-%m-%d'),
+                    'open': np.round(open_price, 2),
+                    'high': np.round(high, 2),
+                    'low': np.round(low, 2),
+                    'close': np.round(close, 2),
+                    'volume': volume
+                })
                 logger.debug(f"Generated {len(df)} mock data rows for {symbol}")
                 return df
                 
@@ -382,23 +626,22 @@ class MockDataSource:
     
     def get_realtime_quotes(self, symbols: List[str]) -> Optional[pd.DataFrame]:
         """获取实时行情（Mock）"""
-        import numpy as np
-        
-        data = []
-        for symbol in symbols:
-            price = self.initial_price * (1 + np.random.normal(0, 0.01))
-            data.append({
-                'symbol': symbol,
-                'current': round(price, 2),
-                'price': round(price, 2)
-            })
-        
-        return pd.DataFrame(data)
+        prices = np.round(self.initial_price * (1 + self._rng.normal(0, 0.01, len(symbols))), 2)
+        
+        return pd.DataFrame({
+            'symbol': list(symbols),
+            'current': prices,
+            'price': prices
+        })
+    
+    def get_latest_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """批量获取最新价格（Mock）"""
+        prices = self.initial_price * (1 + self._rng.normal(0, 0.01, len(symbols)))
+        return dict(zip(symbols, prices.tolist()))
     
     def get_latest_price(self, symbol: str) -> Optional[float]:
         """获取最新价格（Mock）"""
-        import numpy as np
-        return self.initial_price * (1 + np.random.normal(0, 0.01))
+        return float(self.initial_price * (1 + self._rng.normal(0, 0.01)))
 
 
 def bar_to_tick(bar: pd.Series, num_ticks: int = 10) -> List[dict]:
@@ -412,8 +655,6 @@ def bar_to_tick(bar: pd.Series, num_ticks: int = 10) -> List[dict]:
     Returns:
         Tick数据列表，每个tick包含 price, volume, timestamp
     """
-    import numpy as np
-    
     try:
         open_price = float(bar['open'])
         high = float(bar['high'])
@@ -421,37 +662,26 @@ def bar_to_tick(bar: pd.Series, num_ticks: int = 10) -> List[dict]:
         close = float(bar['close'])
         volume = int(bar['volume'])
         
-        # 生成价格序列：open -> high/low -> close
-        prices = []
-        
-        # 开盘价
-        prices.append(open_price)
-        
-        # 中间价格在high和low之间随机游走
-        for i in range(num_ticks - 2):
-            # 随机在high和low之间
-            price = low + (high - low) * np.random.random()
-            prices.append(price)
-        
-        # 收盘价
-        prices.append(close)
+        # 生成价格序列：open -> high/low 之间随机 -> close
+        prices = np.concatenate((
+            [open_price],
+            low + (high - low) * _tick_rng.random(max(num_ticks - 2, 0)),
+            [close]
+        ))
         
         # 分配成交量
-        volumes = np.random.dirichlet(np.ones(num_ticks)) * volume
-        volumes = volumes.astype(int)
+        volumes = (_tick_rng.dirichlet(np.ones(num_ticks)) * volume).astype(np.int64)
         
         # 生成时间戳（假设在一分钟内均匀分布）
-        base_time = datetime.datetime.now()
-        timestamps = [base_time + datetime.timedelta(seconds=i*6) for i in range(num_ticks)]
+        timestamps = pd.date_range(
+            datetime.datetime.now(), periods=num_ticks, freq='6s'
+        ).strftime('%Y-%m-%d %H:%M:%S')
         
         # 组装tick数据
-        ticks = []
-        for price, vol, ts in zip(prices, volumes, timestamps):
-            ticks.append({
-                'price': round(price, 2),
-                'volume': int(vol),
-                'timestamp': ts.strftime('%Y-%m-%d %H:%M:%S')
-            })
+        ticks = [
+            {'price': price, 'volume': vol, 'timestamp': ts}
+            for price, vol, ts in zip(np.round(prices, 2).tolist(), volumes.tolist(), timestamps)
+        ]
         
         return ticks
         
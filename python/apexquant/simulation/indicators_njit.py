@@ -0,0 +1,155 @@
+"""
+ApexQuant 技术指标计算内核
+
+回测逐K线更新均线/RSI用的 Numba 内核，及按股票分行存放收盘价的 CloseMatrix。
+优先使用 _build_kernels.py 预编译（AOT）的 _sim_kernels 扩展，免去首次调用的 JIT 编译；
+否则使用 @njit(cache=True)。Numba 为可选依赖，未安装时按纯 Python 执行，结果一致。
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba.njit 的降级实现"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+def _update_ma_rsi(close, n_short, n_long, rsi_n):
+    """
+    计算最新的短期均线、长期均线和RSI
+
+    只读取末尾窗口，每根K线的计算量与历史长度无关。
+    RSI 为最近 rsi_n 个涨跌幅的简单平均（与内置 RSI 策略一致）。
+
+    Args:
+        close: 按时间排列的收盘价（float64）
+        n_short: 短期均线周期
+        n_long: 长期均线周期
+        rsi_n: RSI周期
+
+    Returns:
+        (ma_short, ma_long, rsi)，数据不足时为 NaN
+    """
+    count = len(close)
+
+    ma_short = np.nan
+    if count >= n_short:
+        total = 0.0
+        for i in range(count - n_short, count):
+            total += close[i]
+        ma_short = total / n_short
+
+    ma_long = np.nan
+    if count >= n_long:
+        total = 0.0
+        for i in range(count - n_long, count):
+            total += close[i]
+        ma_long = total / n_long
+
+    rsi = np.nan
+    if count >= rsi_n + 1:
+        gain_sum = 0.0
+        loss_sum = 0.0
+        for i in range(count - rsi_n, count):
+            change = close[i] - close[i - 1]
+            if change > 0:
+                gain_sum += change
+            else:
+                loss_sum -= change
+
+        avg_gain = gain_sum / rsi_n
+        avg_loss = loss_sum / rsi_n
+        if avg_loss == 0:
+            rsi = 100.0
+        else:
+            rs = avg_gain / avg_loss
+            rsi = 100 - (100 / (1 + rs))
+
+    return ma_short, ma_long, rsi
+
+
+_update_ma_rsi_jit = njit(cache=True)(_update_ma_rsi)
+
+
+def _update_ma_rsi_rows(closes, counts, rows, n_short, n_long, rsi_n):
+    """
+    批量计算收盘价矩阵中指定行的最新均线和RSI
+
+    Args:
+        closes: (股票数, keep) 收盘价矩阵，每行右对齐
+        counts: 每行的有效K线数
+        rows: 需要计算的行号
+        n_short: 短期均线周期
+        n_long: 长期均线周期
+        rsi_n: RSI周期
+
+    Returns:
+        (len(rows), 3) 数组，列依次为 ma_short, ma_long, rsi
+    """
+    width = closes.shape[1]
+    out = np.empty((len(rows), 3))
+    for k in range(len(rows)):
+        i = rows[k]
+        ma_short, ma_long, rsi = _update_ma_rsi_jit(
+            closes[i, width - counts[i]:], n_short, n_long, rsi_n
+        )
+        out[k, 0] = ma_short
+        out[k, 1] = ma_long
+        out[k, 2] = rsi
+    return out
+
+
+# AOT 导出签名
+UPDATE_MA_RSI_SIGNATURE = 'UniTuple(f8, 3)(f8[:], i8, i8, i8)'
+UPDATE_MA_RSI_ROWS_SIGNATURE = 'f8[:, :](f8[:, :], i8[:], i8[:], i8, i8, i8)'
+
+try:
+    from ._sim_kernels import update_ma_rsi, update_ma_rsi_rows
+    AOT_AVAILABLE = True
+except ImportError:
+    AOT_AVAILABLE = False
+    update_ma_rsi = _update_ma_rsi_jit
+    update_ma_rsi_rows = njit(cache=True)(_update_ma_rsi_rows)
+
+
+class CloseMatrix:
+    """
+    多只股票的收盘价矩阵
+
+    每只股票一行，右对齐保留最近 keep 根收盘价，
+    整块 float64 连续存放，可直接传给 update_ma_rsi_rows
+    """
+
+    def __init__(self, symbols, keep: int):
+        """
+        Args:
+            symbols: 股票代码列表
+            keep: 指标计算需要保留的K线数
+        """
+        self.index = {symbol: i for i, symbol in enumerate(dict.fromkeys(symbols))}
+        self.closes = np.full((len(self.index), keep), np.nan)
+        self.counts = np.zeros(len(self.index), dtype=np.int64)
+
+    def push(self, rows: np.ndarray, prices: np.ndarray):
+        """
+        为指定行各追加一个收盘价
+
+        Args:
+            rows: 行号（不重复）
+            prices: 对应的收盘价
+        """
+        closes = self.closes
+        closes[rows, :-1] = closes[rows, 1:]
+        closes[rows, -1] = prices
+        self.counts[rows] = np.minimum(self.counts[rows] + 1, closes.shape[1])
@@ -5,13 +5,53 @@ ApexQuant Performance Analyzer
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from dataclasses import dataclass
 import logging
 
+from .indicators_njit import njit
+
 logger = logging.getLogger(__name__)
 
 
+@njit(cache=True, error_model='numpy')
+def _equity_stats(equity):
+    """
+    由权益值数组计算最大回撤及日收益率的均值、标准差（总体标准差，同 np.std）
+
+    Args:
+        equity: 权益值（float64，长度至少为2）
+
+    Returns:
+        (max_drawdown, mean_return, std_return)，权益值含 NaN 时三者均为 NaN
+    """
+    n = len(equity)
+    peak = equity[0]
+    max_dd = 0.0
+    ret_sum = 0.0
+    for i in range(n):
+        value = equity[i]
+        if np.isnan(value):
+            # 与 np.maximum.accumulate / np.std 一致，NaN 传播到结果而不是被比较跳过
+            return np.nan, np.nan, np.nan
+        if value > peak:
+            peak = value
+        dd = (peak - value) / peak
+        if dd > max_dd:
+            max_dd = dd
+        if i > 0:
+            ret_sum += (value - equity[i - 1]) / equity[i - 1]
+
+    m = n - 1
+    mean = ret_sum / m
+    sq_sum = 0.0
+    for i in range(1, n):
+        diff = (equity[i] - equity[i - 1]) / equity[i - 1] - mean
+        sq_sum += diff * diff
+
+    return max_dd, mean, np.sqrt(sq_sum / m)
+
+
 @dataclass
 class PerformanceMetrics:
     """绩效指标"""
@@ -79,14 +119,14 @@ class PerformanceAnalyzer:
     
     def analyze(
         self,
-        equity_curve: pd.DataFrame,
+        equity_curve: Union[pd.DataFrame, np.ndarray],
         trades: List[dict]
     ) -> PerformanceMetrics:
         """
         分析绩效
         
         Args:
-            equity_curve: 权益曲线 DataFrame，列: [date, equity]
+            equity_curve: 权益曲线 DataFrame（列: [date, equity]），或按时间排列的权益值数组
             trades: 交易记录列表，每个dict包含: {pnl, side, ...}
             
         Returns:
@@ -94,16 +134,25 @@ class PerformanceAnalyzer:
         """
         metrics = PerformanceMetrics()
         
-        if equity_curve is None or equity_curve.empty:
+        if equity_curve is None or len(equity_curve) == 0:
             logger.warning("Empty equity curve, returning zero metrics")
             return metrics
         
+        # 统一转换为连续的 float64 数组
+        if isinstance(equity_curve, pd.DataFrame):
+            if 'equity' not in equity_curve.columns:
+                logger.error("equity column not found in equity_curve")
+                return metrics
+            equity_values = equity_curve['equity'].to_numpy(dtype=np.float64)
+        else:
+            equity_values = np.ascontiguousarray(equity_curve, dtype=np.float64)
+        
         try:
             # 基础收益指标
-            metrics = self._calculate_return_metrics(equity_curve, metrics)
+            metrics = self._calculate_return_metrics(equity_values, metrics)
             
             # 风险指标
-            metrics = self._calculate_risk_metrics(equity_curve, metrics)
+            metrics = self._calculate_risk_metrics(equity_values, metrics)
             
             # 交易统计
             metrics = self._calculate_trade_metrics(trades, metrics)
@@ -117,26 +166,21 @@ class PerformanceAnalyzer:
     
     def _calculate_return_metrics(
         self,
-        equity_curve: pd.DataFrame,
+        equity_values: np.ndarray,
         metrics: PerformanceMetrics
     ) -> PerformanceMetrics:
         """计算收益指标"""
         
-        if len(equity_curve) == 0:
-            return metrics
-        
-        # 确保有equity列
-        if 'equity' not in equity_curve.columns:
-            logger.error("equity column not found in equity_curve")
+        if len(equity_values) == 0:
             return metrics
         
-        final_equity = equity_curve['equity'].iloc[-1]
+        final_equity = equity_values[-1]
         
         # 总收益率
         metrics.total_return = (final_equity - self.initial_capital) / self.initial_capital
         
         # 交易天数
-        metrics.trading_days = len(equity_curve)
+        metrics.trading_days = len(equity_values)
         
         # 年化收益率 (假设一年252个交易日)
         if metrics.trading_days > 0:
@@ -150,68 +194,36 @@ class PerformanceAnalyzer:
     
     def _calculate_risk_metrics(
         self,
-        equity_curve: pd.DataFrame,
+        equity_values: np.ndarray,
         metrics: PerformanceMetrics
     ) -> PerformanceMetrics:
         """计算风险指标"""
         
-        if len(equity_curve) < 2:
+        if len(equity_values) < 2:
             return metrics
         
-        equity_values = equity_curve['equity'].values
-        
-        # 最大回撤
-        metrics.max_drawdown = self._calculate_max_drawdown(equity_values)
-        
-        # 日收益率
-        returns = np.diff(equity_values) / equity_values[:-1]
-        
-        if len(returns) > 0:
-            # 夏普比率 (年化)
-            mean_return = np.mean(returns)
-            std_return = np.std(returns)
-            
-            if std_return > 0:
-                # 将日收益率年化
-                annualized_mean = mean_return * 252
-                annualized_std = std_return * np.sqrt(252)
-                daily_rf_rate = self.risk_free_rate / 252
-                
-                metrics.sharpe_ratio = (
-                    (annualized_mean - self.risk_free_rate) / annualized_std
-                )
-            
-            # 卡玛比率 (年化收益率 / 最大回撤)
-            if metrics.max_drawdown > 0:
-                metrics.calmar_ratio = (
-                    metrics.annualized_return / metrics.max_drawdown
-                )
-        
-        return metrics
-    
-    def _calculate_max_drawdown(self, equity_values: np.ndarray) -> float:
-        """
-        计算最大回撤
+        # 最大回撤及日收益率均值/标准差（Numba 内核）
+        max_drawdown, mean_return, std_return = _equity_stats(equity_values)
+        metrics.max_drawdown = max_drawdown
         
-        Args:
-            equity_values: 权益值数组
+        # 夏普比率 (年化)
+        if std_return > 0:
+            # 将日收益率年化
+            annualized_mean = mean_return * 252
+            annualized_std = std_return * np.sqrt(252)
+            daily_rf_rate = self.risk_free_rate / 252
             
-        Returns:
-            最大回撤（正数）
-        """
-        if len(equity_values) == 0:
-            return 0.0
-        
-        # 计算累计最大值
-        cummax = np.maximum.accumulate(equity_values)
-        
-        # 计算回撤
-        drawdowns = (cummax - equity_values) / cummax
+            metrics.sharpe_ratio = (
+                (annualized_mean - self.risk_free_rate) / annualized_std
+            )
         
-        # 最大回撤
-        max_dd = np.max(drawdowns)
+        # 卡玛比率 (年化收益率 / 最大回撤)
+        if metrics.max_drawdown > 0:
+            metrics.calmar_ratio = (
+                metrics.annualized_return / metrics.max_drawdown
+            )
         
-        return max_dd
+        return metrics
     
     def _calculate_trade_metrics(
         self,
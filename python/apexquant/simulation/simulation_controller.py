@@ -4,6 +4,7 @@ ApexQuant Simulation Controller
 """
 
 import sys
+import time
 from pathlib import Path
 import datetime
 import logging
@@ -83,7 +84,9 @@ class SimulationController:
         self.database = DatabaseManager(self.config.get("database.path", "data/simulation.db"))
         self.data_source = SimulationDataSource(
             primary_source=data_config.get("primary", "baostock"),
-            backup_source=data_config.get("backup", "akshare")
+            backup_source=data_config.get("backup", "akshare"),
+            symbols=data_config.get("symbols"),
+            cache_dir=data_config.get("cache_dir")
         )
         self.risk_manager = RiskManager(risk_config)
         self.performance_analyzer = PerformanceAnalyzer(self.initial_capital)
@@ -301,8 +304,9 @@ class SimulationController:
             cpp_side = sim_cpp.OrderSide.BUY if side.lower() == 'buy' else sim_cpp.OrderSide.SELL
             cpp_type = sim_cpp.OrderType.MARKET if order_type.lower() == 'market' else sim_cpp.OrderType.LIMIT
             
-            order_id = f"ORD_{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}"
-            submit_time = int(datetime.datetime.now().timestamp() * 1000)
+            submit_ns = time.time_ns()
+            order_id = f"ORD_{datetime.datetime.fromtimestamp(submit_ns / 1e9).strftime('%Y%m%d%H%M%S%f')}"
+            submit_time = submit_ns // 1_000_000
             
             order = sim_cpp.SimulatedOrder(
                 order_id,
@@ -496,10 +500,12 @@ class SimulationController:
             return {}
         
         data = {}
-        for _, row in quotes_df.iterrows():
+        columns = list(quotes_df.columns)
+        for values in quotes_df.itertuples(index=False, name=None):
+            row = dict(zip(columns, values))
             symbol = row.get('symbol') or row.get('code')
             if symbol:
-                data[symbol] = row.to_dict()
+                data[symbol] = row
         
         return data
     
@@ -5,6 +5,7 @@ ApexQuant 内置策略
 """
 
 import logging
+import math
 from typing import Dict, Optional, Callable
 from collections import deque
 
@@ -41,16 +42,24 @@ def create_ma_cross_strategy(
         symbol = bar['symbol']
         close_price = bar['close']
         
-        # 添加到历史
-        price_history.append(close_price)
-        
-        # 数据不足，等待
-        if len(price_history) < ma_long:
-            return None
-        
-        # 计算均线
-        ma5 = sum(list(price_history)[-ma_short:]) / ma_short
-        ma20 = sum(list(price_history)[-ma_long:]) / ma_long
+        short_key, long_key = f'ma{ma_short}', f'ma{ma_long}'
+        if short_key in bar and long_key in bar:
+            # 调用方已按股票逐K线计算好均线（NaN 表示数据不足）
+            ma5 = bar[short_key]
+            ma20 = bar[long_key]
+            if math.isnan(ma5) or math.isnan(ma20):
+                return None
+        else:
+            # 添加到历史
+            price_history.append(close_price)
+            
+            # 数据不足，等待
+            if len(price_history) < ma_long:
+                return None
+            
+            # 计算均线
+            ma5 = sum(list(price_history)[-ma_short:]) / ma_short
+            ma20 = sum(list(price_history)[-ma_long:]) / ma_long
         
         # 获取当前持仓
         positions = {p['symbol']: p for p in account_info['positions']}
@@ -282,13 +291,20 @@ def create_rsi_strategy(
         symbol = bar['symbol']
         close_price = bar['close']
         
-        price_history.append(close_price)
-        
-        if len(price_history) < rsi_period + 1:
-            return None
-        
-        # 计算RSI
-        rsi = calculate_rsi(list(price_history))
+        rsi_key = f'rsi{rsi_period}'
+        if rsi_key in bar:
+            # 调用方已按股票逐K线计算好RSI（NaN 表示数据不足）
+            rsi = bar[rsi_key]
+            if math.isnan(rsi):
+                return None
+        else:
+            price_history.append(close_price)
+            
+            if len(price_history) < rsi_period + 1:
+                return None
+            
+            # 计算RSI
+            rsi = calculate_rsi(list(price_history))
         
         # 获取持仓
         positions = {p['symbol']: p for p in account_info['positions']}
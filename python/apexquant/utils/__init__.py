@@ -4,9 +4,11 @@ ApexQuant 工具模块
 
 from .float_utils import float_equal, float_le, float_ge, float_lt, float_gt
 from .time_utils import get_market_time, get_market_timezone, is_market_time
+from .jit_utils import njit, NUMBA_AVAILABLE
 
 __all__ = [
     'float_equal', 'float_le', 'float_ge', 'float_lt', 'float_gt',
-    'get_market_time', 'get_market_timezone', 'is_market_time'
+    'get_market_time', 'get_market_timezone', 'is_market_time',
+    'njit', 'NUMBA_AVAILABLE'
 ]
 
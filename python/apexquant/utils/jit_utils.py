@@ -0,0 +1,32 @@
+"""
+JIT 编译工具
+
+Numba 为可选依赖：已安装时用 numba.njit 编译数值内核，
+未安装时装饰器原样返回函数，按纯 Python 执行
+
+cache=True 的内核默认缓存在模块所在的 __pycache__ 目录；包目录不可写时
+（如系统级安装）无法落盘，每次启动都会重新编译。此时可在启动前设置环境变量
+NUMBA_CACHE_DIR 指定可写目录，例如：
+
+    export NUMBA_CACHE_DIR=~/.cache/apexquant/numba
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """
+        numba.njit 的降级实现
+        
+        支持 @njit、@njit(cache=True) 以及 @njit("签名", ...) 三种写法
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        
+        def decorator(func):
+            return func
+        
+        return decorator
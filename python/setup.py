@@ -2,8 +2,40 @@
 ApexQuant Python 包安装脚本
 """
 
+import importlib.util
+import os
+import sys
+
 from setuptools import setup, find_packages
 
+
+# 会编译扩展模块的命令；egg_info、sdist 等元数据命令不触发 AOT 编译
+_BUILD_COMMANDS = {'build', 'build_ext', 'bdist_wheel', 'bdist_egg', 'install', 'develop', 'editable_wheel'}
+
+
+def _aot_extensions():
+    """
+    构建/安装时预编译模拟盘指标内核（apexquant.simulation._sim_kernels）
+    
+    仅在执行构建命令且可导入 Numba 时生成扩展，否则运行时退回 JIT/纯 Python
+    """
+    if _BUILD_COMMANDS.isdisjoint(sys.argv[1:]):
+        return []
+    if importlib.util.find_spec('numba') is None:
+        return []
+    
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'apexquant', 'simulation', '_build_kernels.py')
+    name = 'apexquant.simulation._build_kernels'
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    except ImportError:
+        return []
+    return [module.cc.distutils_extension()]
+
 with open("../README.md", "r", encoding="utf-8") as f:
     long_description = f.read()
 
@@ -16,6 +48,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/ApexQuant",
     packages=find_packages(),
+    ext_modules=_aot_extensions(),
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
@@ -38,6 +71,17 @@ setup(
         "scikit-learn>=1.3.0",
     ],
     extras_require={
+        # 可选加速：Numba 内核（及安装时 AOT 预编译）、orjson、配置校验
+        "fast": [
+            "numba>=0.58.0",
+            "orjson>=3.9.0",
+            "fastjsonschema>=2.18.0",
+        ],
+        # 模拟盘：AI 顾问连接池、交易所日历
+        "simulation": [
+            "httpx>=0.25.0",
+            "exchange_calendars>=4.5.0",
+        ],
         "all": [
             "anthropic>=0.18.0",
             "xgboost>=2.0.0",
@@ -65,6 +65,56 @@ def test_metrics_exporter():
     print("\n✓ MetricsExporter 测试完成\n")
 
 
+def test_metrics_exporter_types():
+    """指标写入转换数值类型，只读快照拒绝写入，持仓数按 gauge 导出"""
+    from decimal import Decimal
+    
+    exporter = MetricsExporter()
+    exporter.update_account_metrics({'total_assets': Decimal('100000.5'), 'daily_pnl': 12})
+    exporter.update_trading_metrics(trade_count=5.0, position_count=3, orders_submitted=2)
+    
+    metrics = exporter.get_metrics()
+    assert metrics['total_assets'] == 100000.5
+    assert metrics['daily_pnl'] == 12.0
+    assert metrics['trade_count'] == 5
+    assert metrics['position_count'] == 3
+    
+    try:
+        exporter.metrics['trade_count'] = 100
+        assert False, "metrics 快照应拒绝写入"
+    except TypeError:
+        pass
+    assert exporter.get_metrics()['trade_count'] == 5
+    
+    text = exporter.export_prometheus_format()
+    assert '# TYPE apexquant_position_count gauge' in text
+    assert 'apexquant_position_count{system="apexquant",version="1.0.0"} 3\n' in text
+    assert 'apexquant_trade_count{system="apexquant",version="1.0.0"} 5\n' in text
+
+
+def test_metrics_exporter_concurrent_updates():
+    """多线程并发累加计数不丢失"""
+    import threading
+    
+    exporter = MetricsExporter()
+    
+    def worker():
+        for _ in range(2000):
+            exporter.increment_signal_count()
+            exporter.update_trading_metrics(trade_count=1, position_count=2, orders_submitted=1)
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    metrics = exporter.get_metrics()
+    assert metrics['signal_count'] == 16000
+    assert metrics['orders_submitted'] == 16000
+    assert metrics['position_count'] == 2
+
+
 def test_anomaly_detector():
     """测试异常检测"""
     print("=" * 60)
@@ -131,6 +181,22 @@ def test_anomaly_detector():
     print("\n✓ AnomalyDetector 测试完成\n")
 
 
+def test_anomaly_thresholds_edited_in_place():
+    """直接修改 thresholds 字典后，检测立即使用新阈值"""
+    detector = AnomalyDetector()
+    metrics = {'max_drawdown': 0.15, 'win_rate': 0.5, 'position_count': 3}
+    
+    assert detector.detect_metric_anomalies(metrics) == []
+    
+    detector.thresholds['max_drawdown'] = 0.10
+    anomalies = detector.detect_metric_anomalies(metrics)
+    assert [a['type'] for a in anomalies] == ['high_drawdown']
+    assert anomalies[0]['threshold'] == 0.10
+    
+    detector.set_thresholds({'max_drawdown': 0.30})
+    assert detector.detect_metric_anomalies(metrics) == []
+
+
 def test_log_analysis():
     """测试日志分析"""
     print("=" * 60)
@@ -67,6 +67,61 @@ def test_signal_generator():
     print("\n✓ AISignalGenerator 测试完成\n")
 
 
+def test_quick_indicators_flat_series():
+    """平盘行情的均线相等，应判为震荡而不是空头排列"""
+    from apexquant.live.signal_generator import _compute_quick_indicators
+    
+    for price in (10.1, 17.77, 8.88):
+        close = np.full(30, price)
+        volume = np.full(30, 1e6)
+        ind = _compute_quick_indicators(close, volume)
+        assert ind.trend == 'range'
+    
+    generator = AISignalGenerator.__new__(AISignalGenerator)
+    data = pd.DataFrame({'close': np.full(30, 17.77), 'volume': np.full(30, 1e6)})
+    action, _, _ = generator._rule_based_signal("600519", 17.77, data, {'volume': 100})
+    assert action == 'hold'
+
+
+def test_ai_signal_label_priority():
+    """同一行含多个标签时按 动作 > 强度 > 理由 解析，与标签在行内的顺序无关"""
+    class FakeClient:
+        def chat(self, messages, temperature=0.3, max_tokens=200):
+            return "动作: 持有\n理由: 强度 75，可以买入"
+    
+    generator = AISignalGenerator.__new__(AISignalGenerator)
+    generator.client = FakeClient()
+    generator.ai_enabled = True
+    
+    action, confidence, reason = generator._ai_generate_signal("股票代码: 600519")
+    
+    assert action == 'hold'
+    assert confidence == 0.75
+    assert reason == "AI 分析"
+
+
+def test_batch_signals_failure_fallback():
+    """单只股票信号生成抛异常时，该股票回退为观望信号，其余结果保留"""
+    generator = AISignalGenerator.__new__(AISignalGenerator)
+    generator.ai_enabled = True
+    
+    def fake_generate(symbol, current_price, data, news=None, position=None):
+        if symbol == "600036":
+            raise RuntimeError("api error")
+        return 'buy', 0.8, "测试"
+    
+    generator.generate_signal = fake_generate
+    data = pd.DataFrame({'close': np.full(30, 10.0), 'volume': np.full(30, 1e6)})
+    symbols = ["600519", "600036", "000001"]
+    
+    signals = generator.batch_generate_signals(symbols, {sym: data for sym in symbols})
+    
+    assert list(signals) == symbols
+    assert signals["600036"] == generator._rule_based_signal_simple()
+    assert signals["600519"] == ('buy', 0.8, "测试")
+    assert signals["000001"] == ('buy', 0.8, "测试")
+
+
 def test_rl_agent():
     """测试 RL 交易代理"""
     print("=" * 60)
@@ -110,6 +165,35 @@ def test_rl_agent():
     print("\n✓ RLTradingAgent 测试完成\n")
 
 
+def test_rl_agent_legacy_q_table():
+    """旧版元组键 Q-table 加载后各状态互不覆盖，保存再加载保持一致"""
+    import pickle
+    import tempfile
+    
+    legacy = {
+        (15,) + (0,) * 9: np.array([1.0, 0.0, 0.0]),
+        (9,) + (0,) * 9: np.array([0.0, 2.0, 0.0]),
+        (-30,) + (1,) * 9: np.array([0.0, 0.0, 3.0]),
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.pkl')
+        with open(legacy_path, 'wb') as f:
+            pickle.dump({'q_table': legacy, 'state_dim': 10, 'action_dim': 3}, f)
+        
+        agent = RLTradingAgent()
+        agent.load_model(legacy_path)
+        assert len(agent.q_table) == len(legacy)
+        for key, q_values in legacy.items():
+            np.testing.assert_array_equal(agent.q_table[agent._encode_discrete(np.array(key))], q_values)
+        
+        model_path = os.path.join(tmp, 'model.npz')
+        agent.save_model(model_path)
+        reloaded = RLTradingAgent()
+        reloaded.load_model(model_path)
+        assert set(reloaded.q_table) == set(agent.q_table)
+
+
 def test_live_trader():
     """测试实盘交易管理器"""
     print("=" * 60)
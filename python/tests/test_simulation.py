@@ -5,6 +5,9 @@ ApexQuant 模拟盘系统单元测试
 import unittest
 import sys
 import os
+import tempfile
+from pathlib import Path
+from unittest import mock
 
 # 添加路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -13,7 +16,9 @@ from apexquant.simulation.database import DatabaseManager
 from apexquant.simulation.config import SimulationConfig
 from apexquant.simulation.risk_manager import RiskManager
 from apexquant.simulation.trading_calendar import TradingCalendar
-from apexquant.simulation.data_source import MockDataSource, bar_to_tick
+from apexquant.simulation.data_source import MockDataSource, SimulationDataSource, bar_to_tick
+from apexquant.simulation.performance_analyzer import PerformanceAnalyzer
+from apexquant.simulation.ai_advisor import AITradingAdvisor, OPENAI_AVAILABLE
 import datetime
 
 
@@ -78,6 +83,92 @@ class TestConfig(unittest.TestCase):
         config = SimulationConfig()
         result = config.validate()
         self.assertTrue(result)
+    
+    def test_section_mutation_visible(self):
+        """修改返回的配置节后，get 和 validate 读到最新值"""
+        with tempfile.TemporaryDirectory() as tmp:
+            config = SimulationConfig(os.path.join(tmp, 'sim.yaml'))
+            
+            config.get_account_config()['initial_capital'] = 5
+            self.assertEqual(config.get('account.initial_capital'), 5)
+            
+            config.get('account')['commission_rate'] = 0.5
+            self.assertEqual(config.get('account.commission_rate'), 0.5)
+            self.assertFalse(config.validate())
+    
+    def test_set_updates_get(self):
+        """set 之后 get 返回新值，替换整节后下级路径同步更新"""
+        with tempfile.TemporaryDirectory() as tmp:
+            config = SimulationConfig(os.path.join(tmp, 'sim.yaml'))
+            
+            config.set('account.initial_capital', 200000.0)
+            self.assertEqual(config.get('account.initial_capital'), 200000.0)
+            config.set('account.initial_capital', 300000.0)
+            self.assertEqual(config.get('account.initial_capital'), 300000.0)
+            
+            config.set('account', {'initial_capital': 1.0})
+            self.assertEqual(config.get('account.initial_capital'), 1.0)
+            self.assertIsNone(config.get('account.commission_rate'))
+            
+            config.set('new.section.key', 'v')
+            self.assertEqual(config.get('new.section'), {'key': 'v'})
+
+
+class TestConfigCache(unittest.TestCase):
+    """测试配置的 JSON 缓存和全局实例缓存"""
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.config_dir = os.path.join(tmp.name, 'config')
+        self.cache_dir = os.path.join(tmp.name, 'cache')
+        os.makedirs(self.config_dir)
+        self.config_path = os.path.join(self.config_dir, 'sim.yaml')
+        with open(self.config_path, 'w', encoding='utf-8') as f:
+            f.write("account:\n  initial_capital: 50000.0\n")
+    
+    def test_json_cache_in_cache_dir(self):
+        """JSON 缓存写入缓存目录，不写到配置文件旁边"""
+        config = SimulationConfig(self.config_path, cache_dir=self.cache_dir)
+        
+        self.assertTrue(config.cache_path.exists())
+        self.assertEqual(str(config.cache_path.parent), self.cache_dir)
+        self.assertEqual(os.listdir(self.config_dir), ['sim.yaml'])
+    
+    def test_json_cache_reused_and_invalidated(self):
+        """配置文件未变时从缓存加载，修改后重新解析 YAML"""
+        import yaml
+        SimulationConfig(self.config_path, cache_dir=self.cache_dir)
+        
+        with mock.patch('apexquant.simulation.config.yaml.load', wraps=yaml.load) as load:
+            config = SimulationConfig(self.config_path, cache_dir=self.cache_dir)
+            self.assertEqual(config.get('account.initial_capital'), 50000.0)
+            load.assert_not_called()
+            
+            with open(self.config_path, 'w', encoding='utf-8') as f:
+                f.write("account:\n  initial_capital: 80000.0\n")
+            config = SimulationConfig(self.config_path, cache_dir=self.cache_dir)
+            self.assertEqual(config.get('account.initial_capital'), 80000.0)
+            load.assert_called_once()
+    
+    def test_get_config_per_path(self):
+        """get_config 按配置文件路径缓存实例，reset_config 后重新加载"""
+        from apexquant.simulation.config import get_config, reset_config
+        self.addCleanup(reset_config)
+        patcher = mock.patch('apexquant.simulation.config._DEFAULT_CACHE_DIR', Path(self.cache_dir))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        other_path = os.path.join(self.config_dir, 'other.yaml')
+        with open(other_path, 'w', encoding='utf-8') as f:
+            f.write("account:\n  initial_capital: 1.0\n")
+        
+        config = get_config(self.config_path)
+        self.assertIs(get_config(self.config_path), config)
+        self.assertIsNot(get_config(other_path), config)
+        self.assertEqual(get_config(other_path).get('account.initial_capital'), 1.0)
+        
+        reset_config()
+        self.assertIsNot(get_config(self.config_path), config)
 
 
 class TestRiskManager(unittest.TestCase):
@@ -224,6 +315,264 @@ class TestDataSource(unittest.TestCase):
         self.assertIn('volume', ticks[0])
 
 
+class TestDataSourceCache(unittest.TestCase):
+    """测试 SimulationDataSource 的K线/交易日缓存"""
+    
+    def setUp(self):
+        import pandas as pd
+        
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+        
+        patcher = mock.patch('apexquant.simulation.data_source.MultiSourceDataFetcher')
+        self.fetcher = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        
+        self.bars = pd.DataFrame({
+            'date': ['2023-01-03', '2023-01-04'],
+            'open': [10.1, 10.2],
+            'high': [10.5, 10.6],
+            'low': [9.9, 10.0],
+            'close': [10.3, 1 / 3],
+            'volume': [1000000, 2000000],
+        })
+        self.fetcher.get_stock_data.return_value = self.bars
+    
+    def _source(self, **kwargs):
+        return SimulationDataSource(cache_dir=self.cache_dir, **kwargs)
+    
+    def test_stock_data_disk_cache(self):
+        """已结束区间的K线写入磁盘，新实例直接读取"""
+        df = self._source().get_stock_data('600000', '2023-01-01', '2023-01-31')
+        self.assertTrue(df.equals(self.bars))
+        
+        cached = self._source().get_stock_data('600000', '2023-01-01', '2023-01-31')
+        self.assertEqual(self.fetcher.get_stock_data.call_count, 1)
+        self.assertEqual(list(cached.columns), list(self.bars.columns))
+        self.assertEqual(cached['close'].tolist(), self.bars['close'].tolist())
+        self.assertEqual(cached['date'].tolist(), self.bars['date'].tolist())
+    
+    def test_stock_data_cache_keyed_by_source(self):
+        """不同数据源不共用磁盘缓存"""
+        self._source().get_stock_data('600000', '2023-01-01', '2023-01-31')
+        self._source(primary_source='akshare', backup_source='baostock').get_stock_data(
+            '600000', '2023-01-01', '2023-01-31'
+        )
+        self.assertEqual(self.fetcher.get_stock_data.call_count, 2)
+    
+    def test_open_range_not_persisted(self):
+        """未结束的区间只缓存在进程内"""
+        source = self._source()
+        source.get_stock_data('600000', '2023-01-01', '2999-12-31')
+        source.get_stock_data('600000', '2023-01-01', '2999-12-31')
+        self.assertEqual(self.fetcher.get_stock_data.call_count, 1)
+        
+        self._source().get_stock_data('600000', '2023-01-01', '2999-12-31')
+        self.assertEqual(self.fetcher.get_stock_data.call_count, 2)
+    
+    def test_clear_cache(self):
+        """清空缓存后重新请求数据源"""
+        source = self._source()
+        source.get_stock_data('600000', '2023-01-01', '2023-01-31')
+        source.clear_cache()
+        
+        source.get_stock_data('600000', '2023-01-01', '2023-01-31')
+        self._source().get_stock_data('600000', '2023-01-01', '2023-01-31')
+        self.assertEqual(self.fetcher.get_stock_data.call_count, 2)
+    
+    def test_trading_days_disk_cache(self):
+        """已结束区间的交易日写入磁盘，新实例不再请求指数日线"""
+        with mock.patch('apexquant.simulation.data_source.EXCHANGE_CALENDARS_AVAILABLE', False):
+            days = self._source().get_trading_days('2023-01-01', '2023-01-31')
+            self.assertEqual(days, ['2023-01-03', '2023-01-04'])
+            
+            self.fetcher.get_stock_data.reset_mock()
+            days = self._source().get_trading_days('2023-01-01', '2023-01-31')
+            self.assertEqual(days, ['2023-01-03', '2023-01-04'])
+            self.fetcher.get_stock_data.assert_not_called()
+
+
+class TestLatestPrices(unittest.TestCase):
+    """测试批量获取最新价格"""
+    
+    def setUp(self):
+        patcher = mock.patch('apexquant.simulation.data_source.MultiSourceDataFetcher')
+        self.fetcher = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.source = SimulationDataSource()
+    
+    def test_batched_prices(self):
+        """多只股票一次请求，按代码列对应价格"""
+        import pandas as pd
+        self.fetcher.get_realtime_quotes.return_value = pd.DataFrame({
+            'code': ['600000', '000001', '300750'],
+            'price': [10.5, 11.2, 180.0],
+        })
+        
+        prices = self.source.get_latest_prices(['600000', '000001', '300750'])
+        self.assertEqual(prices, {'sh.600000': 10.5, 'sz.000001': 11.2, 'sz.300750': 180.0})
+        self.assertEqual(self.fetcher.get_realtime_quotes.call_count, 1)
+    
+    def test_non_numeric_price_dropped(self):
+        """停牌股票的非数值价格只剔除该股票"""
+        import pandas as pd
+        self.fetcher.get_realtime_quotes.return_value = pd.DataFrame({
+            'symbol': ['sh.600000', 'sz.000001'],
+            'current': ['-', '11.2'],
+        })
+        
+        prices = self.source.get_latest_prices(['600000', '000001'])
+        self.assertEqual(prices, {'sz.000001': 11.2})
+    
+    def test_single_symbol_by_position(self):
+        """单只股票取第一行价格，不依赖行情中的代码格式"""
+        import pandas as pd
+        self.fetcher.get_realtime_quotes.return_value = pd.DataFrame({
+            'code': ['sh600000'],
+            'price': [10.5],
+        })
+        
+        self.assertEqual(self.source.get_latest_price('600000'), 10.5)
+        
+        self.fetcher.get_realtime_quotes.return_value = pd.DataFrame({'price': ['-']})
+        self.assertIsNone(self.source.get_latest_price('600000'))
+
+
+class TestPerformanceAnalyzer(unittest.TestCase):
+    """测试绩效分析"""
+    
+    def setUp(self):
+        self.analyzer = PerformanceAnalyzer(initial_capital=100000)
+    
+    def test_risk_metrics(self):
+        """最大回撤与夏普比率"""
+        import numpy as np
+        equity = np.array([100000.0, 110000.0, 99000.0, 104500.0, 120000.0])
+        
+        metrics = self.analyzer.analyze(equity, [])
+        
+        self.assertAlmostEqual(metrics.max_drawdown, 0.1)
+        returns = np.diff(equity) / equity[:-1]
+        expected = (returns.mean() * 252 - 0.03) / (returns.std() * np.sqrt(252))
+        self.assertAlmostEqual(metrics.sharpe_ratio, expected)
+    
+    def test_nan_equity_propagates(self):
+        """权益值含 NaN 时最大回撤为 NaN，不被当作无回撤"""
+        import numpy as np
+        equity = np.array([100000.0, 90000.0, np.nan, 80000.0])
+        
+        metrics = self.analyzer.analyze(equity, [])
+        
+        self.assertTrue(np.isnan(metrics.max_drawdown))
+        self.assertEqual(metrics.sharpe_ratio, 0.0)
+
+
+@unittest.skipUnless(OPENAI_AVAILABLE, "openai not installed")
+class TestAIAdvisor(unittest.TestCase):
+    """测试AI顾问的异步与流式接口（API 调用以 mock 代替）"""
+    
+    REPLY = '{"action": "buy", "volume": 100, "confidence": 0.8, "reasoning": "test"}'
+    
+    def setUp(self):
+        config = mock.MagicMock()
+        config.get_ai_config.return_value = {'api_key': 'test-key', 'max_concurrency': 2}
+        patcher = mock.patch('apexquant.simulation.ai_advisor.get_config', return_value=config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.advisor = AITradingAdvisor()
+        self.addCleanup(self.advisor.close)
+        self.account = {'total_assets': 100000.0, 'available_cash': 100000.0, 'positions': []}
+    
+    def _response(self, content):
+        from types import SimpleNamespace
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(total_tokens=10)
+        )
+    
+    def test_agenerate_trading_signals(self):
+        """多个股票并发请求，结果按股票代码返回，相同行情命中缓存"""
+        import asyncio
+        aclient = mock.MagicMock()
+        aclient.chat.completions.create = mock.AsyncMock(return_value=self._response(self.REPLY))
+        self.advisor.aclient = aclient
+        market = {'600000': {'price': 10.0}, '000001': {'price': 12.0}}
+        
+        signals = asyncio.run(self.advisor.agenerate_trading_signals(
+            ['600000', '000001'], market, self.account
+        ))
+        
+        self.assertEqual(list(signals), ['600000', '000001'])
+        for signal in signals.values():
+            self.assertEqual(signal['action'], 'BUY')
+            self.assertEqual(signal['confidence'], 0.8)
+        self.assertEqual(aclient.chat.completions.create.await_count, 2)
+        
+        asyncio.run(self.advisor.agenerate_trading_signals(['600000'], market, self.account))
+        self.assertEqual(aclient.chat.completions.create.await_count, 2)
+        self.assertEqual(self.advisor.get_statistics()['total_calls'], 2)
+    
+    def test_agenerate_api_error(self):
+        """API 出错时返回 HOLD 信号"""
+        import asyncio
+        aclient = mock.MagicMock()
+        aclient.chat.completions.create = mock.AsyncMock(side_effect=RuntimeError("timeout"))
+        self.advisor.aclient = aclient
+        
+        signal = asyncio.run(self.advisor.agenerate_trading_signal('600000', {'price': 10.0}, self.account))
+        self.assertEqual(signal['action'], 'HOLD')
+    
+    def test_batch_prompt_positions(self):
+        """批量信号的prompt按股票代码带上持仓，不修改传入的 account_info"""
+        import copy
+        reply = '{"signals": [' + ', '.join(
+            '{"symbol": "%s", "action": "hold", "confidence": 0.5}' % symbol for symbol in ('600000', '000001')
+        ) + ']}'
+        self.advisor.client = mock.MagicMock()
+        self.advisor.client.chat.completions.create.return_value = self._response(reply)
+        account = dict(self.account, positions=[
+            {'symbol': '600000', 'volume': 300, 'avg_cost': 9.5},
+            {'symbol': '000002', 'volume': 0},
+        ])
+        snapshot = copy.deepcopy(account)
+        
+        signals = self.advisor.generate_trading_signals(
+            ['600000', '000001'], {'600000': {'price': 10.0}, '000001': {'price': 12.0}}, account
+        )
+        
+        prompt = self.advisor.client.chat.completions.create.call_args.kwargs['messages'][1]['content']
+        blocks = prompt.split('### SYMBOL: ')
+        self.assertIn('Position: 300 shares at cost 9.50', blocks[1])
+        self.assertIn('Position: No position', blocks[2])
+        self.assertEqual(signals['000001']['action'], 'HOLD')
+        self.assertEqual(account, snapshot)
+    
+    def test_stream_trading_signal(self):
+        """流式响应解析出 action/confidence 后提前回调一次，结束后返回完整信号"""
+        from types import SimpleNamespace
+        
+        def chunk(text):
+            return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+        
+        pieces = [self.REPLY[i:i + 8] for i in range(0, len(self.REPLY), 8)]
+        stream = [chunk(piece) for piece in pieces]
+        stream.append(SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=10)))
+        self.advisor.client = mock.MagicMock()
+        self.advisor.client.chat.completions.create.return_value = iter(stream)
+        
+        provisional = []
+        signal = self.advisor.stream_trading_signal(
+            '600000', {'price': 10.0}, self.account, on_provisional=provisional.append
+        )
+        
+        self.assertEqual(provisional, [{'action': 'BUY', 'confidence': 0.8}])
+        self.assertEqual(signal['action'], 'BUY')
+        self.assertEqual(signal['volume'], 100)
+        self.assertEqual(self.advisor.get_statistics()['total_tokens'], 10)
+
+
 def run_tests():
     """运行所有测试"""
     loader = unittest.TestLoader()
@@ -232,9 +581,14 @@ def run_tests():
     # 添加测试
     suite.addTests(loader.loadTestsFromTestCase(TestDatabase))
     suite.addTests(loader.loadTestsFromTestCase(TestConfig))
+    suite.addTests(loader.loadTestsFromTestCase(TestConfigCache))
     suite.addTests(loader.loadTestsFromTestCase(TestRiskManager))
     suite.addTests(loader.loadTestsFromTestCase(TestTradingCalendar))
     suite.addTests(loader.loadTestsFromTestCase(TestDataSource))
+    suite.addTests(loader.loadTestsFromTestCase(TestDataSourceCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestLatestPrices))
+    suite.addTests(loader.loadTestsFromTestCase(TestPerformanceAnalyzer))
+    suite.addTests(loader.loadTestsFromTestCase(TestAIAdvisor))
     
     # 运行测试
     runner = unittest.TextTestRunner(verbosity=2)